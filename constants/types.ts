@@ -17,6 +17,8 @@ const TYPES = {
   AdministratorsHandler: Symbol.for("AdministratorsHandler"),
   AdministratorsRepository: Symbol.for("AdministratorsRepository"),
   ClasHandler: Symbol.for("ClasHandler"),
+  CheckJobsRepository: Symbol.for("CheckJobsRepository"),
+  ClaCheckQueue: Symbol.for("ClaCheckQueue"),
 };
 
 export {TYPES};
@@ -0,0 +1,26 @@
+import {NextApiRequest, NextApiResponse} from "next";
+import {container} from "../../../service/di";
+import {TYPES} from "../../../constants/types";
+import {ContributorLicenseAgreement} from "../../../service/domain/cla";
+import {ClasHandler} from "../../../service/handlers/clas";
+import {CursorPaginatedSet} from "../../../service/common/paging";
+import {createAPIHandler} from "../../../pages-common/apiHandler";
+
+const clasHandler = container.get<ClasHandler>(TYPES.ClasHandler);
+
+export default createAPIHandler({
+  GET: async (
+    req: NextApiRequest,
+    res: NextApiResponse<CursorPaginatedSet<ContributorLicenseAgreement>>
+  ) => {
+    const {cursor, size, search} = req.query;
+
+    const data = await clasHandler.getClas({
+      cursor: cursor ? cursor.toString() : undefined,
+      size: size ? parseInt(size.toString(), 10) : 50,
+      search: search ? search.toString() : undefined,
+    });
+
+    res.status(200).json(data);
+  },
+});
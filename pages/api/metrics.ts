@@ -0,0 +1,28 @@
+import {NextApiRequest, NextApiResponse} from "next";
+import {CacheStats} from "../../service/common/cache";
+import {claLookupCache} from "../../service/data/edgedb/cla";
+import {
+  CheckQueueMetrics,
+  ClaCheckQueue,
+} from "../../service/handlers/check-queue";
+import {container} from "../../service/di";
+import {TYPES} from "../../constants/types";
+import {createAPIHandler} from "../../pages-common/apiHandler";
+
+const claCheckQueue = container.get<ClaCheckQueue>(TYPES.ClaCheckQueue);
+
+interface Metrics {
+  claLookupCache: CacheStats;
+  checkQueue: CheckQueueMetrics;
+}
+
+// Returns in-process counters of this instance of the web application,
+// useful to see how much work is saved by caches and by coalescing checks.
+export default createAPIHandler({
+  GET: async (req: NextApiRequest, res: NextApiResponse<Metrics>) => {
+    res.status(200).json({
+      claLookupCache: claLookupCache.stats,
+      checkQueue: await claCheckQueue.getMetrics(),
+    });
+  },
+});
@@ -1,6 +1,6 @@
 import * as crypto from "crypto";
 
-import {ClaCheckHandler} from "../../../service/handlers/check-cla";
+import {ClaCheckQueue} from "../../../service/handlers/check-queue";
 import {ClaCheckInput} from "../../../service/domain/cla";
 import {TYPES} from "../../../constants/types";
 import {NextApiRequest, NextApiResponse} from "next";
@@ -17,9 +17,12 @@ export const config = {
 };
 
 // Handler for GitHub pull requests.
-// It verifies that the user who is creating a PR signed the CLA,
-// and posts a status check to the PR.
-const claHandler = container.get<ClaCheckHandler>(TYPES.ClaCheckHandler);
+// It enqueues a check that verifies that the user who is creating a PR
+// signed the CLA, and posts a status check to the PR.
+const claCheckQueue = container.get<ClaCheckQueue>(TYPES.ClaCheckQueue);
+
+// process jobs left pending, for example by a previous instance
+claCheckQueue.start();
 
 export default createAPIHandler({
   POST: {
@@ -189,8 +192,8 @@ async function _handler(
         },
       };
 
-      await claHandler.checkCla(input);
-      return res.status(200).end("OK");
+      await claCheckQueue.enqueue(input);
+      return res.status(202).end("Accepted");
 
     default:
       return res.status(400).end(`The event ${event} is not handled.`);
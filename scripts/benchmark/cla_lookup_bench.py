@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark both CLA lookup paths of `EdgeDBClaRepository` on synthetic data.
+
+The benchmark works in a dedicated database (`--database`, created on first
+use) that gets the schema from `dbschema/migrations`. It fills the
+ContributorLicenseAgreement table up to each of `--sizes` rows and, at every
+size, times the two query shapes used by `getClaByEmailAddress`:
+
+* `email`: the `.normalized_email` lookup for regular addresses;
+* `noreply`: the `.username` lookup for `@users.noreply.github.com` addresses.
+
+Each path is measured "cold" (a fresh client, every key looked up once) and
+"warm" (a small set of keys looked up repeatedly). Half of the keys exist and
+half don't, since unsigned authors are as common as signed ones.
+
+Results are keyed by the number of rows actually in the table, which exceeds
+the requested size when an earlier run loaded more rows and `--reset` wasn't
+given. Save a baseline with `--save-baseline FILE`; later runs with
+`--baseline FILE` exit with status 1 when any p95 regresses beyond
+`--tolerance`, and with status 2 when they measured other table sizes.
+`--drop-username-index` measures the schema without the `.username` index
+for comparison.
+"""
+
+from __future__ import annotations
+
+import argparse
+from datetime import datetime, timedelta, timezone
+import json
+from pathlib import Path
+import random
+import sys
+import time
+
+import edgedb
+
+from latency import summarize
+
+
+MIGRATIONS_DIR = Path(__file__).resolve().parents[2] / "dbschema" / "migrations"
+LOAD_BATCH_SIZE = 5_000
+
+# Keep these in sync with service/data/edgedb/cla.ts.
+EMAIL_QUERY = """
+SELECT assert_single((SELECT ContributorLicenseAgreement {
+  email,
+  username,
+  creation_time,
+  versionId := .agreement_version.id
+}
+FILTER .normalized_email = str_lower(<str>$0)));
+"""
+NOREPLY_QUERY = """
+SELECT ContributorLicenseAgreement {
+  email,
+  username,
+  creation_time,
+  versionId := .agreement_version.id
+}
+FILTER .username = <str>$0
+ORDER BY .email
+LIMIT 1;
+"""
+
+LOAD_QUERY = """
+WITH version := (SELECT AgreementVersion FILTER .id = <uuid>$version)
+FOR item IN {json_array_unpack(<json>$rows)} UNION (
+  INSERT ContributorLicenseAgreement {
+    email := <str>item['email'],
+    username := <str>item['username'],
+    creation_time := <datetime><str>item['creation_time'],
+    agreement_version := version
+  }
+);
+"""
+
+
+def synthetic_row(i: int) -> dict[str, str]:
+    """Deterministic CLA row number `i`; mixed-case emails like real ones."""
+    signed_at = datetime(2017, 2, 1, tzinfo=timezone.utc) + timedelta(minutes=i)
+    return {
+        "email": f"Contributor.{i}@Example{i % 97}.org",
+        "username": f"gh-contributor-{i}",
+        "creation_time": signed_at.isoformat(),
+    }
+
+
+def connect(args: argparse.Namespace, database: str) -> edgedb.Client:
+    return edgedb.create_client(dsn=args.dsn, database=database)
+
+
+def prepare_database(args: argparse.Namespace) -> None:
+    admin = connect(args, "edgedb")
+    try:
+        admin.execute(f"CREATE DATABASE {args.database};")
+        print(f"Created database {args.database}.")
+    except edgedb.DuplicateDatabaseDefinitionError:
+        pass
+    finally:
+        admin.close()
+
+    con = connect(args, args.database)
+    try:
+        applied = set(con.query("SELECT schema::Migration.name;"))
+        for migration in sorted(MIGRATIONS_DIR.glob("*.edgeql")):
+            text = migration.read_text()
+            name = text.split()[2]  # CREATE MIGRATION <name>
+            if name not in applied:
+                print(f"Applying migration {migration.name}.")
+                con.execute(text)
+        if args.reset:
+            con.execute("DELETE ContributorLicenseAgreement;")
+        set_username_index(con, present=not args.drop_username_index)
+    finally:
+        con.close()
+
+
+def set_username_index(con: edgedb.Client, present: bool) -> None:
+    """Make the index on `.username` match `present`, even after earlier runs."""
+    exists = con.query_single(
+        """
+        SELECT count((
+            SELECT schema::ObjectType
+            FILTER .name = 'default::ContributorLicenseAgreement'
+        ).indexes FILTER .expr = '.username') > 0;
+        """
+    )
+    if exists == present:
+        return
+    action = "CREATE" if present else "DROP"
+    con.execute(
+        f"""
+        ALTER TYPE default::ContributorLicenseAgreement {{
+            {action} INDEX ON (.username);
+        }};
+        """
+    )
+    print(f"{'Created' if present else 'Dropped'} the index on .username.")
+
+
+def agreement_version_id(con: edgedb.Client) -> str:
+    version = con.query_single("SELECT AgreementVersion LIMIT 1;")
+    if version is None:
+        version = con.query_single("INSERT AgreementVersion { draft := false };")
+    return str(version.id)
+
+
+def fill_to(con: edgedb.Client, size: int, version: str) -> int:
+    """Load rows up to `size`, returning the number of rows in the table."""
+    count = con.query_single("SELECT count(ContributorLicenseAgreement);")
+    start = time.perf_counter()
+    for batch_start in range(count, size, LOAD_BATCH_SIZE):
+        rows = [
+            synthetic_row(i)
+            for i in range(batch_start, min(size, batch_start + LOAD_BATCH_SIZE))
+        ]
+        con.query(LOAD_QUERY, version=version, rows=json.dumps(rows))
+    if size > count:
+        elapsed = time.perf_counter() - start
+        print(f"Loaded {size - count} rows in {elapsed:.1f}s.")
+    elif count > size:
+        print(
+            f"Table already has {count} rows, more than {size}: measuring at "
+            f"{count} rows, use --reset to measure at {size}."
+        )
+    return max(count, size)
+
+
+def lookup_keys(
+    path: str, size: int, samples: int, rng: random.Random
+) -> list[str]:
+    """Random keys for `path`: half of them exist in the table."""
+    keys = []
+    for n in range(samples):
+        i = rng.randrange(size)
+        if n % 2:
+            i += size * 10  # never loaded
+        row = synthetic_row(i)
+        if path == "email":
+            keys.append(row["email"].lower())
+        else:
+            keys.append(f"{i}+{row['username']}@users.noreply.github.com")
+    return keys
+
+
+def time_lookups(con: edgedb.Client, path: str, keys: list[str]) -> list[float]:
+    latencies = []
+    for key in keys:
+        start = time.perf_counter()
+        if path == "email":
+            con.query_single(EMAIL_QUERY, key)
+        else:
+            username = key.split("@", 1)[0].split("+", 1)[1]
+            con.query(NOREPLY_QUERY, username)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def run(args: argparse.Namespace) -> dict[str, dict[str, float]]:
+    prepare_database(args)
+    rng = random.Random(args.seed)
+    results: dict[str, dict[str, float]] = {}
+
+    con = connect(args, args.database)
+    try:
+        version = agreement_version_id(con)
+        for size in args.sizes:
+            rows = fill_to(con, size, version)
+            for path in ("email", "noreply"):
+                # "Cold": a fresh client with nothing compiled or cached on
+                # our side, and every key queried exactly once.
+                cold_con = connect(args, args.database)
+                try:
+                    cold = time_lookups(
+                        cold_con, path, lookup_keys(path, rows, args.samples, rng)
+                    )
+                finally:
+                    cold_con.close()
+
+                hot_keys = lookup_keys(path, rows, 10, rng)
+                time_lookups(con, path, hot_keys)
+                warm = time_lookups(
+                    con, path, [rng.choice(hot_keys) for _ in range(args.samples)]
+                )
+
+                for phase, latencies in (("cold", cold), ("warm", warm)):
+                    # Keyed by the actual row count, which is more than
+                    # `size` when earlier runs loaded more rows.
+                    key = f"{rows}/{path}/{phase}"
+                    results[key] = {"rows": rows, **summarize(latencies)}
+                    print(
+                        f"{key:<24} p50 {results[key]['p50']:7.1f}ms  "
+                        f"p95 {results[key]['p95']:7.1f}ms  "
+                        f"max {results[key]['max']:7.1f}ms"
+                    )
+    finally:
+        con.close()
+    return results
+
+
+def size_mismatch(
+    results: dict[str, dict[str, float]], baseline: dict[str, dict[str, float]]
+) -> str | None:
+    """Why `results` can't be compared to `baseline`, if they can't."""
+    measured = {stats["rows"] for stats in results.values()}
+    available = {stats.get("rows") for stats in baseline.values()}
+    missing = sorted(measured - available)
+    if missing:
+        return (
+            f"the baseline has no measurements at {missing} rows, only at "
+            f"{sorted(rows for rows in available if rows is not None)}; "
+            f"rerun with --reset and the --sizes of the baseline"
+        )
+    return None
+
+
+def regressions(
+    results: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    tolerance: float,
+    slack_ms: float,
+) -> list[str]:
+    failures = []
+    for key, stats in sorted(results.items()):
+        if key not in baseline:
+            continue
+        allowed = baseline[key]["p95"] * (1 + tolerance) + slack_ms
+        if stats["p95"] > allowed:
+            failures.append(
+                f"{key}: p95 {stats['p95']:.1f}ms > {allowed:.1f}ms allowed "
+                f"(baseline {baseline[key]['p95']:.1f}ms)"
+            )
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--dsn", default=None, help="EdgeDB DSN; defaults to the EDGEDB_* environment"
+    )
+    parser.add_argument("--database", default="cla_bench")
+    parser.add_argument(
+        "--sizes",
+        type=lambda s: [int(x) for x in s.split(",")],
+        default=[10_000, 100_000, 1_000_000],
+        help="comma-separated table sizes",
+    )
+    parser.add_argument("--samples", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--reset", action="store_true", help="delete loaded rows first")
+    parser.add_argument("--drop-username-index", action="store_true")
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--save-baseline", type=Path)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument(
+        "--slack-ms",
+        type=float,
+        default=1.0,
+        help="absolute p95 increase always tolerated, to absorb noise",
+    )
+    args = parser.parse_args()
+
+    results = run(args)
+
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Saved baseline to {args.save_baseline}.")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        mismatch = size_mismatch(results, baseline)
+        if mismatch:
+            print(f"Cannot compare with {args.baseline}: {mismatch}.", file=sys.stderr)
+            sys.exit(2)
+        failures = regressions(results, baseline, args.tolerance, args.slack_ms)
+        for failure in failures:
+            print(f"REGRESSION {failure}", file=sys.stderr)
+        if failures:
+            sys.exit(1)
+        print("No regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+
+"""
+A local stand-in for the parts of the GitHub REST API used by the CLA bot.
+
+Start the web app with `GITHUB_API_URL=http://127.0.0.1:8099` (and a throwaway
+`GITHUB_RSA_PRIVATE_KEY`, the fake doesn't verify JWTs) to benchmark webhook
+handling without touching GitHub. Every request is answered after a
+configurable latency and counted by kind; `GET /_stats` returns the counters
+and `POST /_reset` clears them.
+
+Pull requests have `--commits` commits each, authored by `--authors` distinct
+addresses: `author<N>@<--email-domain>`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import collections
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+
+# GitHub never lists more than this many commits for a pull request.
+MAX_PR_COMMITS = 250
+DEFAULT_PAGE_SIZE = 30
+MAX_PAGE_SIZE = 100
+
+ROUTES = [
+    ("GET", re.compile(r"^/app$"), "app"),
+    ("GET", re.compile(r"^/app/installations$"), "installations"),
+    (
+        "POST",
+        re.compile(r"^/app/installations/(?P<id>\d+)/access_tokens$"),
+        "access_token",
+    ),
+    ("GET", re.compile(r"^/repos/[^/]+/[^/]+/pulls/(?P<number>\d+)$"), "pull"),
+    (
+        "GET",
+        re.compile(r"^/repos/[^/]+/[^/]+/pulls/(?P<number>\d+)/commits$"),
+        "commits",
+    ),
+    ("POST", re.compile(r"^/repos/[^/]+/[^/]+/statuses/(?P<sha>\w+)$"), "status"),
+    (
+        "POST",
+        re.compile(r"^/repos/[^/]+/[^/]+/issues/(?P<number>\d+)/comments$"),
+        "create_comment",
+    ),
+    (
+        "PATCH",
+        re.compile(r"^/repos/[^/]+/[^/]+/issues/comments/(?P<id>\d+)$"),
+        "update_comment",
+    ),
+]
+
+
+class Stats:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.calls: collections.Counter[str] = collections.Counter()
+
+    def count(self, kind: str) -> None:
+        with self.lock:
+            self.calls[kind] += 1
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            calls = dict(self.calls)
+        return {"calls": calls, "total": sum(calls.values())}
+
+    def reset(self) -> None:
+        with self.lock:
+            self.calls.clear()
+
+
+class FakeGitHubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], args: argparse.Namespace) -> None:
+        super().__init__(address, FakeGitHubHandler)
+        self.args = args
+        self.stats = Stats()
+        self.comment_ids = itertools.count(1)
+
+    def delay(self) -> None:
+        latency = self.args.latency_ms + random.uniform(0, self.args.jitter_ms)
+        if latency > 0:
+            time.sleep(latency / 1000)
+
+
+class FakeGitHubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: FakeGitHubServer
+
+    def log_message(self, format: str, *args) -> None:
+        if self.server.args.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self) -> None:
+        self.dispatch("GET")
+
+    def do_POST(self) -> None:
+        self.dispatch("POST")
+
+    def do_PATCH(self) -> None:
+        self.dispatch("PATCH")
+
+    def dispatch(self, method: str) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+
+        url = urlparse(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+        if url.path == "/_stats" and method == "GET":
+            return self.reply(200, self.server.stats.snapshot())
+        if url.path == "/_reset" and method == "POST":
+            self.server.stats.reset()
+            return self.reply(200, {})
+
+        for route_method, pattern, kind in ROUTES:
+            match = pattern.match(url.path)
+            if route_method == method and match:
+                self.server.stats.count(kind)
+                self.server.delay()
+                handler = getattr(self, f"handle_{kind}")
+                return handler(query=query, **match.groupdict())
+
+        self.server.stats.count("unknown")
+        self.reply(404, {"message": "Not Found"})
+
+    def reply(self, status: int, data: object, headers: dict | None = None) -> None:
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def handle_app(self, query: dict) -> None:
+        account_id = self.server.args.account_id
+        self.reply(
+            200,
+            {
+                "id": 1,
+                "slug": "cla-bot",
+                "owner": {"login": "fake", "id": account_id, "type": "Organization"},
+            },
+        )
+
+    def handle_installations(self, query: dict) -> None:
+        self.reply(200, [{"id": 1, "target_id": self.server.args.account_id}])
+
+    def handle_access_token(self, query: dict, id: str) -> None:
+        expires_at = datetime.now(timezone.utc) + timedelta(hours=1)
+        self.reply(
+            201,
+            {
+                "token": f"fake-installation-token-{id}",
+                "expires_at": expires_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "permissions": {"statuses": "write", "pull_requests": "write"},
+                "repository_selection": "all",
+            },
+        )
+
+    def handle_pull(self, query: dict, number: str) -> None:
+        self.reply(
+            200,
+            {
+                "id": int(number),
+                "number": int(number),
+                "commits": self.server.args.commits,
+                "state": "open",
+            },
+        )
+
+    def handle_commits(self, query: dict, number: str) -> None:
+        args = self.server.args
+        # Like GitHub, treat page 0 as page 1 and clamp the page size.
+        page = max(1, int(query.get("page", 1)))
+        size = min(MAX_PAGE_SIZE, int(query.get("per_page", DEFAULT_PAGE_SIZE)))
+        total = min(args.commits, MAX_PR_COMMITS)
+        start = (page - 1) * size
+        end = min(total, start + size)
+        items = [make_commit(int(number), i, args) for i in range(start, end)]
+        headers = {}
+        if end < total:
+            path = urlparse(self.path).path
+            last = -(-total // size)
+            headers["Link"] = (
+                f'<{path}?per_page={size}&page={page + 1}>; rel="next", '
+                f'<{path}?per_page={size}&page={last}>; rel="last"'
+            )
+        self.reply(200, items, headers)
+
+    def handle_status(self, query: dict, sha: str) -> None:
+        self.reply(201, {"state": "success"})
+
+    def handle_create_comment(self, query: dict, number: str) -> None:
+        self.reply(201, {"id": next(self.server.comment_ids)})
+
+    def handle_update_comment(self, query: dict, id: str) -> None:
+        self.reply(200, {"id": int(id)})
+
+
+def make_commit(pull_number: int, index: int, args: argparse.Namespace) -> dict:
+    author = index % args.authors
+    person = {
+        "name": f"Author {author}",
+        "email": f"author{author}@{args.email_domain}",
+        "date": "2022-01-01T00:00:00Z",
+    }
+    sha = f"{pull_number:08x}{index:032x}"
+    return {
+        "sha": sha,
+        "node_id": sha,
+        "commit": {
+            "author": person,
+            "committer": person,
+            "message": f"Commit {index}",
+            "url": "",
+        },
+        "url": "",
+        "html_url": "",
+        "author": {"login": f"author{author}"},
+        "committer": {"login": f"author{author}"},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument(
+        "--latency-ms", type=float, default=50.0, help="base latency per call"
+    )
+    parser.add_argument(
+        "--jitter-ms", type=float, default=20.0, help="random extra latency"
+    )
+    parser.add_argument(
+        "--commits", type=int, default=3, help="commits per pull request"
+    )
+    parser.add_argument(
+        "--authors", type=int, default=1, help="distinct authors per pull request"
+    )
+    parser.add_argument("--email-domain", default="example.com")
+    parser.add_argument(
+        "--account-id",
+        type=int,
+        default=1,
+        help="owner id the GitHub app is installed on",
+    )
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    server = FakeGitHubServer((args.host, args.port), args)
+    print(f"Fake GitHub API listening on http://{args.host}:{args.port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+"""Latency statistics shared by the benchmark scripts."""
+
+from __future__ import annotations
+
+
+def percentile(values: list[float], p: float) -> float:
+    """Nearest-rank percentile; 0.0 for an empty list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * p // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize(values: list[float]) -> dict[str, float]:
+    """p50/p95/p99/max of `values`, rounded to 0.1."""
+    return {
+        "p50": round(percentile(values, 50), 1),
+        "p95": round(percentile(values, 95), 1),
+        "p99": round(percentile(values, 99), 1),
+        "max": round(percentile(values, 100), 1),
+    }
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+
+"""
+Replay signed `pull_request` webhooks against a running CLA bot instance.
+
+Events are sent open-loop at `--rate` per second, so latency is measured from
+the moment each event was due, not from when a free worker picked it up: a
+saturated server shows up as growing latency instead of a silently lower
+send rate. When `--fake-github` points at `fake_github.py`, the GitHub API
+calls made by the bot are reported per event as well.
+
+The bot only enqueues CLA checks before answering 202, so the latency above
+is the enqueue latency. The run then polls the queue depth from `--metrics`
+until the background workers have processed every check. The drain time is
+reported as well, and GitHub API calls are counted only after the drain.
+The metrics endpoint requires an admin access token: pass the JWT that the
+admin UI keeps in session storage with `--token`.
+
+Typical run, with the bot started with `GITHUB_API_URL=http://127.0.0.1:8099`:
+
+    python3 fake_github.py --commits 250 --authors 5 &
+    CLA_BOT_ACCESS_TOKEN=... python3 webhook_bench.py --rate 20 --events 500
+"""
+
+from __future__ import annotations
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import collections
+import hashlib
+import hmac
+import http.client
+import json
+import os
+import secrets
+import threading
+import time
+from urllib.parse import urlparse
+
+from latency import summarize
+
+
+def make_payload(args: argparse.Namespace, seq: int) -> bytes:
+    number = seq % args.prs + 1
+    owner, name = args.repo.split("/", 1)
+    payload = {
+        "action": args.action,
+        "number": number,
+        "pull_request": {
+            "id": 1_000_000 + number,
+            "number": number,
+            "html_url": f"https://github.com/{args.repo}/pull/{number}",
+            "head": {"sha": secrets.token_hex(20)},
+            "user": {"id": 1_000 + number},
+        },
+        "repository": {
+            "id": 1,
+            "name": name,
+            "full_name": args.repo,
+            "owner": {"id": args.account_id, "login": owner},
+        },
+    }
+    return json.dumps(payload).encode()
+
+
+def sign(secret: str, body: bytes) -> str:
+    return "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+class WebhookSender:
+    """Sends webhooks over one kept-alive connection per worker thread."""
+
+    def __init__(self, target: str, secret: str, timeout: float) -> None:
+        self.url = urlparse(target)
+        self.secret = secret
+        self.timeout = timeout
+        self.local = threading.local()
+
+    def connection(self) -> http.client.HTTPConnection:
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            cls = (
+                http.client.HTTPSConnection
+                if self.url.scheme == "https"
+                else http.client.HTTPConnection
+            )
+            conn = cls(self.url.netloc, timeout=self.timeout)
+            self.local.conn = conn
+        return conn
+
+    def send(self, body: bytes) -> int:
+        headers = {
+            "Content-Type": "application/json",
+            "X-GitHub-Event": "pull_request",
+            "X-GitHub-Delivery": secrets.token_hex(16),
+        }
+        if self.secret:
+            headers["X-Hub-Signature-256"] = sign(self.secret, body)
+        conn = self.connection()
+        try:
+            conn.request("POST", self.url.path or "/", body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            return response.status
+        except Exception:
+            conn.close()
+            self.local.conn = None
+            raise
+
+
+def github_stats(url: str | None, reset: bool = False) -> dict:
+    if not url:
+        return {}
+    parsed = urlparse(url)
+    conn = http.client.HTTPConnection(parsed.netloc, timeout=10)
+    try:
+        conn.request("POST" if reset else "GET", "/_reset" if reset else "/_stats")
+        return json.loads(conn.getresponse().read() or b"{}")
+    finally:
+        conn.close()
+
+
+def queue_depth(url: str, token: str) -> int:
+    parsed = urlparse(url)
+    conn = http.client.HTTPConnection(parsed.netloc, timeout=10)
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    try:
+        conn.request("GET", parsed.path or "/", headers=headers)
+        response = conn.getresponse()
+        body = response.read()
+        if response.status != 200:
+            raise SystemExit(
+                f"GET {url} answered {response.status} "
+                f"{body.decode(errors='replace')[:200]!r}; the metrics endpoint "
+                f"needs an admin access token, see --token"
+            )
+        return json.loads(body)["checkQueue"]["depth"]
+    finally:
+        conn.close()
+
+
+def wait_for_drain(url: str | None, token: str, timeout: float) -> float | None:
+    """Seconds until the check queue is empty, None on timeout."""
+    if not url:
+        return 0.0
+    start = time.monotonic()
+    while time.monotonic() - start < timeout:
+        if queue_depth(url, token) == 0:
+            return time.monotonic() - start
+        time.sleep(0.2)
+    return None
+
+
+def run(args: argparse.Namespace) -> dict:
+    sender = WebhookSender(args.target, args.secret, args.timeout)
+    latencies: list[float] = []
+    statuses: collections.Counter[str] = collections.Counter()
+    lock = threading.Lock()
+
+    def fire(due: float, body: bytes) -> None:
+        try:
+            status = str(sender.send(body))
+        except Exception as e:
+            status = type(e).__name__
+        elapsed = time.monotonic() - due
+        with lock:
+            statuses[status] += 1
+            if status.startswith("2"):
+                latencies.append(elapsed * 1000)
+
+    # Fail before sending anything if the metrics can't be read.
+    if args.metrics:
+        queue_depth(args.metrics, args.token)
+    github_stats(args.fake_github, reset=True)
+    interval = 1.0 / args.rate
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for seq in range(args.events):
+            due = start + seq * interval
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(fire, due, make_payload(args, seq))
+    duration = time.monotonic() - start
+    drain = wait_for_drain(args.metrics, args.token, args.drain_timeout)
+    calls = github_stats(args.fake_github)
+
+    ok = len(latencies)
+    total_duration = duration + (drain if drain is not None else args.drain_timeout)
+    report = {
+        "events": args.events,
+        "ok": ok,
+        "statuses": dict(statuses),
+        "duration_s": round(duration, 3),
+        "throughput_eps": round(ok / duration, 2) if duration else 0.0,
+        "latency_ms": summarize(latencies),
+        "drain_s": round(drain, 3) if drain is not None else None,
+        "checks_per_s": round(ok / total_duration, 2) if total_duration else 0.0,
+    }
+    if calls:
+        total = calls.get("total", 0)
+        report["github_calls"] = {
+            "total": total,
+            "per_event": round(total / args.events, 2) if args.events else 0.0,
+            "by_kind": calls.get("calls", {}),
+        }
+    return report
+
+
+def print_report(report: dict) -> None:
+    lat = report["latency_ms"]
+    print(f"events sent:      {report['events']}")
+    print(f"responses:        {report['statuses']}")
+    print(f"duration:         {report['duration_s']:.1f}s")
+    print(f"throughput:       {report['throughput_eps']:.2f} events/s")
+    print(
+        f"latency:          p50 {lat['p50']:.0f}ms  p95 {lat['p95']:.0f}ms  "
+        f"p99 {lat['p99']:.0f}ms  max {lat['max']:.0f}ms"
+    )
+    if report["drain_s"] is None:
+        print("queue drain:      timed out, GitHub calls are incomplete")
+    else:
+        print(f"queue drain:      {report['drain_s']:.1f}s after the last event")
+    print(f"checks:           {report['checks_per_s']:.2f} events/s end to end")
+    calls = report.get("github_calls")
+    if calls:
+        print(
+            f"GitHub API calls: {calls['total']} total, "
+            f"{calls['per_event']:.2f} per event"
+        )
+        for kind, count in sorted(calls["by_kind"].items()):
+            print(f"  {kind:<16}{count}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--target", default="http://localhost:3000/api/pullrequesthook"
+    )
+    parser.add_argument(
+        "--fake-github",
+        default="http://127.0.0.1:8099",
+        help="fake_github.py base URL for call counts; empty to skip",
+    )
+    parser.add_argument(
+        "--metrics",
+        default="http://localhost:3000/api/metrics",
+        help="bot metrics URL, polled until the check queue is empty; empty to skip",
+    )
+    parser.add_argument(
+        "--token",
+        default=os.environ.get("CLA_BOT_ACCESS_TOKEN", ""),
+        help="admin access token (JWT) for --metrics, "
+        "defaults to $CLA_BOT_ACCESS_TOKEN",
+    )
+    parser.add_argument(
+        "--drain-timeout",
+        type=float,
+        default=300.0,
+        help="max seconds to wait for the check queue to drain",
+    )
+    parser.add_argument(
+        "--secret",
+        default=os.environ.get("GITHUB_WEBHOOK_SECRET", ""),
+        help="webhook secret, defaults to $GITHUB_WEBHOOK_SECRET",
+    )
+    parser.add_argument("--rate", type=float, default=10.0, help="events per second")
+    parser.add_argument("--events", type=int, default=100)
+    parser.add_argument(
+        "--concurrency", type=int, default=32, help="max requests in flight"
+    )
+    parser.add_argument(
+        "--prs", type=int, default=10, help="distinct pull requests to cycle through"
+    )
+    parser.add_argument("--repo", default="python/cpython")
+    parser.add_argument("--account-id", type=int, default=1)
+    parser.add_argument("--action", default="synchronize")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--json", action="store_true", help="print a JSON report")
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -13,7 +13,9 @@ import sys
 from urllib.parse import urlparse
 
 from edb_healthcheck import healthcheck
+from limits import Limits
 from mv import Minivisor
+from web_healthcheck import HTTPHealthcheck
 
 
 def ensure_dead_with_parent():
@@ -99,6 +101,8 @@ async def main() -> None:
         f"--backend-dsn={DATABASE_URL}",
         with_healthcheck=healthcheck,
         grace_period=20.0,
+        # Compiling queries or migrations shouldn't starve webhook handling.
+        limits=Limits.from_env("edgedb", nice=5),
     )
 
     os.environ["EDGEDB_HOST"] = "127.0.0.1"
@@ -109,7 +113,17 @@ async def main() -> None:
 
     untangle_github_rsa_private_key()
 
-    await mv.spawn("yarn", "next", "start", "-p", PORT)
+    await mv.spawn(
+        "yarn",
+        "next",
+        "start",
+        "-p",
+        PORT,
+        with_healthcheck=HTTPHealthcheck(port=int(PORT)),
+        grace_period=20.0,
+        sleep_period=15.0,
+        limits=Limits.from_env("web"),
+    )
     await mv.wait_until_any_terminates()
 
 
@@ -17,6 +17,8 @@ import edgedb
 from rich.console import Console
 from rich.progress import Progress
 
+from instrumentation import instrument
+
 
 load_dotenv()
 
@@ -28,26 +30,31 @@ DATE_FORMAT = "<Date %Y-%m-%d.%H:%M:%S.000>"
 
 console = Console()
 print = console.print
+metrics = instrument("bpo_import")
 
 
 print("Opening JSON file", end="... ")
-with Path("out.json").open() as f:
+with metrics.phase("load json"), Path("out.json").open() as f:
     clas = json.load(f)
 print("done.")
 
 
 print("Connecting to EdgeDB", end="... ")
-con = edgedb.create_client(
-    host="localhost",
-    user="edgedb",
-    database="edgedb",
-    password=EDGEDB_PASSWORD,
-)
+with metrics.phase("connect"):
+    con = metrics.wrap(
+        edgedb.create_client(
+            host="localhost",
+            user="edgedb",
+            database="edgedb",
+            password=EDGEDB_PASSWORD,
+        ),
+        "edgedb",
+    )
 print("connected.")
 
 new_clas = 0
 cla_count_before = 0
-with Progress(console=console) as progress:
+with metrics.phase("import"), Progress(console=console) as progress:
     task = progress.add_task("Importing new CLAs", total=len(clas))
 
     result = con.query(
@@ -60,7 +67,8 @@ with Progress(console=console) as progress:
 
         email = cla["email"].lower().strip()
         username = cla["username"]
-        cla_date = datetime.strptime(cla["cla_date"], DATE_FORMAT)
+        with metrics.measure("strptime"):
+            cla_date = datetime.strptime(cla["cla_date"], DATE_FORMAT)
         cla_date = cla_date.replace(tzinfo=timezone.utc)
 
         result = con.query(
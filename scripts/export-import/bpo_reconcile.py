@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+
+"""
+Compare the CLAs exported from bugs.python.org with the ones in EdgeDB.
+
+Both sides are sorted by normalized email with an external merge sort,
+in runs of `--run-size` rows spilled to temporary files, then merge-joined
+in a single pass: memory use depends on the run size, not on the number of
+CLAs. Discrepancies are written to `--output` as NDJSON, one per line:
+
+* `missing_in_edgedb`: signed on bpo, not imported;
+* `missing_in_bpo`: in EdgeDB, unknown to bpo (e.g. signed through the bot);
+* `username_mismatch`: the GitHub usernames differ (ignoring case);
+* `date_mismatch`: the signature dates differ by more than
+  `--date-tolerance` seconds.
+
+The input is the `out.json` written by `bpo_export.py`.
+"""
+
+from __future__ import annotations
+
+import argparse
+from datetime import datetime, timezone
+import heapq
+import itertools
+import json
+from pathlib import Path
+import tempfile
+from typing import Any, Dict, Iterable, Iterator, TextIO, Tuple
+
+from rich.console import Console
+
+from cla_export import connect, iter_clas
+
+
+DATE_FORMAT = "<Date %Y-%m-%d.%H:%M:%S.000>"
+
+Record = Tuple[str, Dict[str, Any]]
+
+
+console = Console()
+print = console.print
+
+
+def normalize_email(email: str) -> str:
+    # Same as bpo_import.py, so both sides match the imported rows.
+    return email.lower().strip()
+
+
+def iter_json_array(path: Path, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """Yields the items of a top-level JSON array, without loading it all."""
+    decoder = json.JSONDecoder()
+    with path.open() as f:
+        buffer = f.read(chunk_size).lstrip()
+        if not buffer.startswith("["):
+            raise ValueError(f"{path} doesn't contain a JSON array")
+        buffer = buffer[1:]
+        while True:
+            buffer = buffer.lstrip().lstrip(",").lstrip()
+            if buffer.startswith("]"):
+                return
+            try:
+                item, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                more = f.read(chunk_size)
+                if not more:
+                    raise
+                buffer += more
+                continue
+            yield item
+            buffer = buffer[end:]
+
+
+def bpo_records(path: Path) -> Iterator[Record]:
+    for cla in iter_json_array(path):
+        signed_at = datetime.strptime(cla["cla_date"], DATE_FORMAT)
+        yield normalize_email(cla["email"]), {
+            "email": cla["email"],
+            "username": cla["username"],
+            "signed_at": signed_at.replace(tzinfo=timezone.utc).isoformat(),
+            "bpo": cla.get("bpo"),
+        }
+
+
+def edgedb_records(batch_size: int) -> Iterator[Record]:
+    con = connect()
+    try:
+        for cla in iter_clas(con, None, batch_size):
+            yield normalize_email(cla.email), {
+                "email": cla.email,
+                "username": cla.username,
+                "signed_at": cla.signed_at,
+                "id": str(cla.id),
+            }
+    finally:
+        con.close()
+
+
+def write_run(records: list[Record], directory: Path, number: int) -> Path:
+    records.sort(key=lambda record: record[0])
+    path = directory / f"run-{number:05d}.ndjson"
+    with path.open("w") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+    return path
+
+
+def read_run(f: TextIO) -> Iterator[Record]:
+    for line in f:
+        key, row = json.loads(line)
+        yield key, row
+
+
+def external_sort(
+    records: Iterable[Record], run_size: int, directory: Path
+) -> Iterator[Record]:
+    """Sorts records by key, keeping at most `run_size` of them in memory."""
+    runs = []
+    run: list[Record] = []
+    for record in records:
+        run.append(record)
+        if len(run) >= run_size:
+            runs.append(write_run(run, directory, len(runs)))
+            run = []
+    if not runs:
+        # everything fits in memory
+        yield from sorted(run, key=lambda record: record[0])
+        return
+    if run:
+        runs.append(write_run(run, directory, len(runs)))
+
+    files = [path.open() for path in runs]
+    try:
+        yield from heapq.merge(
+            *(read_run(f) for f in files), key=lambda record: record[0]
+        )
+    finally:
+        for f in files:
+            f.close()
+
+
+def started(records: Iterator[Record]) -> Iterator[Record]:
+    """Runs an external sort up to its first record, spilling all its runs."""
+    first = next(records, None)
+    return itertools.chain([] if first is None else [first], records)
+
+
+def grouped(records: Iterator[Record]) -> Iterator[tuple[str, list[dict]]]:
+    for key, group in itertools.groupby(records, key=lambda record: record[0]):
+        yield key, [row for _, row in group]
+
+
+def merge_join(
+    left: Iterator[tuple[str, list[dict]]],
+    right: Iterator[tuple[str, list[dict]]],
+) -> Iterator[tuple[str, list[dict], list[dict]]]:
+    """Full outer join of two streams of (key, rows) sorted by key."""
+    lgroup, rgroup = next(left, None), next(right, None)
+    while lgroup is not None or rgroup is not None:
+        if rgroup is None or (lgroup is not None and lgroup[0] < rgroup[0]):
+            yield lgroup[0], lgroup[1], []
+            lgroup = next(left, None)
+        elif lgroup is None or rgroup[0] < lgroup[0]:
+            yield rgroup[0], [], rgroup[1]
+            rgroup = next(right, None)
+        else:
+            yield lgroup[0], lgroup[1], rgroup[1]
+            lgroup, rgroup = next(left, None), next(right, None)
+
+
+def compare(
+    email: str, bpo: list[dict], edgedb: list[dict], date_tolerance: float
+) -> Iterator[dict[str, Any]]:
+    """Discrepancies for one email; bpo can list the same address twice."""
+    if not edgedb:
+        yield {"kind": "missing_in_edgedb", "email": email, "bpo": bpo}
+        return
+    if not bpo:
+        yield {"kind": "missing_in_bpo", "email": email, "edgedb": edgedb}
+        return
+
+    cla = edgedb[0]
+    usernames = {(row["username"] or "").lower() for row in bpo}
+    if (cla["username"] or "").lower() not in usernames:
+        yield {
+            "kind": "username_mismatch",
+            "email": email,
+            "bpo": bpo,
+            "edgedb": cla,
+        }
+
+    signed_at = datetime.fromisoformat(cla["signed_at"])
+    if all(
+        abs((datetime.fromisoformat(row["signed_at"]) - signed_at).total_seconds())
+        > date_tolerance
+        for row in bpo
+    ):
+        yield {
+            "kind": "date_mismatch",
+            "email": email,
+            "bpo": bpo,
+            "edgedb": cla,
+        }
+
+
+def reconcile(args: argparse.Namespace) -> dict[str, int]:
+    counts = {
+        "bpo": 0,
+        "edgedb": 0,
+        "missing_in_edgedb": 0,
+        "missing_in_bpo": 0,
+        "username_mismatch": 0,
+        "date_mismatch": 0,
+    }
+
+    def counted(side: str, records: Iterator[Record]) -> Iterator[Record]:
+        for record in records:
+            counts[side] += 1
+            yield record
+
+    with tempfile.TemporaryDirectory(dir=args.tmpdir) as tmp:
+        bpo_dir, edgedb_dir = Path(tmp) / "bpo", Path(tmp) / "edgedb"
+        bpo_dir.mkdir()
+        edgedb_dir.mkdir()
+
+        print("Sorting the bpo export", end="... ")
+        bpo = started(
+            external_sort(
+                counted("bpo", bpo_records(args.input)), args.run_size, bpo_dir
+            )
+        )
+        print("done.")
+        print("Sorting EdgeDB CLAs", end="... ")
+        edgedb = started(
+            external_sort(
+                counted("edgedb", edgedb_records(args.batch_size)),
+                args.run_size,
+                edgedb_dir,
+            )
+        )
+        print("done.")
+
+        with args.output.open("w") as out:
+            for email, bpo_rows, edgedb_rows in merge_join(
+                grouped(bpo), grouped(edgedb)
+            ):
+                for issue in compare(
+                    email, bpo_rows, edgedb_rows, args.date_tolerance
+                ):
+                    counts[issue["kind"]] += 1
+                    out.write(json.dumps(issue) + "\n")
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--input", type=Path, default=Path("out.json"))
+    parser.add_argument("--output", type=Path, default=Path("reconcile.ndjson"))
+    parser.add_argument(
+        "--run-size",
+        type=int,
+        default=50_000,
+        help="rows sorted in memory at once",
+    )
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--date-tolerance", type=float, default=1.0)
+    parser.add_argument(
+        "--tmpdir", type=Path, default=None, help="where sorted runs are spilled"
+    )
+    args = parser.parse_args()
+
+    counts = reconcile(args)
+    print(f"Compared {counts['bpo']} bpo rows with {counts['edgedb']} EdgeDB CLAs.")
+    for kind in (
+        "missing_in_edgedb",
+        "missing_in_bpo",
+        "username_mismatch",
+        "date_mismatch",
+    ):
+        print(f"  {kind:<20}{counts[kind]}")
+    print(f"Details written to {args.output}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+
+"""
+Export CLAs from EdgeDB to NDJSON or CSV, with a checksum manifest.
+
+The table is read in pages ordered by (creation_time, id), each page
+starting right after the last row of the previous one, and rows are written
+as they arrive: memory use doesn't depend on the size of the table.
+Outputs whose name ends with `.gz` are gzip-compressed.
+
+Next to the output, `<output>.manifest.json` records the row count, the
+SHA-256 of the file and the cursor of the last exported row. Pass that
+manifest to `--since` to export only CLAs created afterwards, and to
+`--verify` to check a file before restoring it.
+
+Note that `bpo_import.py` backdates `creation_time` to the date the CLA was
+signed on bugs.python.org: after such an import, take a full export.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+from datetime import datetime, timezone
+import gzip
+import hashlib
+import io
+import json
+import os
+from pathlib import Path
+from typing import Any, BinaryIO, Iterator
+from urllib.parse import urlparse
+
+from dotenv import load_dotenv
+import edgedb
+from rich.console import Console
+from rich.progress import Progress
+
+
+load_dotenv()
+
+FIELDS = ["id", "email", "username", "creation_time", "agreement_version_id"]
+
+CLA_SHAPE = """
+SELECT ContributorLicenseAgreement {
+    id,
+    email,
+    username,
+    signed_at := <str>.creation_time,
+    agreement_version_id := .agreement_version.id
+}
+"""
+# Rows after the cursor in (creation_time, id) order; the first condition
+# alone lets the index on .creation_time skip the rows already exported.
+AFTER_CURSOR_FILTER = """
+FILTER .creation_time >= <datetime><str>$after_time
+AND (.creation_time > <datetime><str>$after_time OR .id > <uuid>$after_id)
+"""
+
+
+console = Console(stderr=True)
+print = console.print
+
+
+class HashingWriter(io.RawIOBase):
+    """Passes bytes through to a file, computing their SHA-256."""
+
+    def __init__(self, raw: BinaryIO) -> None:
+        self.raw = raw
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: bytes) -> int:
+        self.sha256.update(data)
+        self.size += len(data)
+        return self.raw.write(data)
+
+
+def connect() -> edgedb.Client:
+    database_url = os.environ["DATABASE_URL"]
+    return edgedb.create_client(
+        host="localhost",
+        user="edgedb",
+        database="edgedb",
+        password=urlparse(database_url).password,
+    )
+
+
+def file_sha256(path: Path) -> str:
+    sha256 = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def read_cursor(manifest_path: Path) -> dict[str, str] | None:
+    return json.loads(manifest_path.read_text())["cursor"]
+
+
+def cursor_args(cursor: dict[str, str] | None) -> tuple[str, dict[str, str]]:
+    if cursor is None:
+        return "", {}
+    return AFTER_CURSOR_FILTER, {
+        "after_time": cursor["creation_time"],
+        "after_id": cursor["id"],
+    }
+
+
+def iter_clas(
+    con: edgedb.Client, cursor: dict[str, str] | None, batch_size: int
+) -> Iterator[Any]:
+    """Yields CLAs after `cursor`, fetching `batch_size` rows at a time."""
+    while True:
+        filter, args = cursor_args(cursor)
+        page = con.query(
+            f"{CLA_SHAPE} {filter} ORDER BY .creation_time THEN .id "
+            "LIMIT <int64>$limit;",
+            limit=batch_size,
+            **args,
+        )
+        yield from page
+        if len(page) < batch_size:
+            return
+        cursor = {"creation_time": page[-1].signed_at, "id": str(page[-1].id)}
+
+
+def count_clas(con: edgedb.Client, cursor: dict[str, str] | None) -> int:
+    filter, args = cursor_args(cursor)
+    return con.query_single(
+        f"SELECT count((SELECT ContributorLicenseAgreement {filter}));", **args
+    )
+
+
+def export(args: argparse.Namespace) -> None:
+    since = read_cursor(args.since) if args.since else None
+    output: Path = args.output
+    partial = output.with_name(output.name + ".part")
+    compressed = output.suffix == ".gz"
+    started_at = datetime.now(timezone.utc)
+
+    print("Connecting to EdgeDB", end="... ")
+    con = connect()
+    print("connected.")
+
+    rows = 0
+    cursor = since
+    with partial.open("wb") as raw, Progress(console=console) as progress:
+        task = progress.add_task("Exporting CLAs", total=count_clas(con, since))
+        hashing = HashingWriter(raw)
+        binary: io.BufferedIOBase = (
+            gzip.GzipFile(fileobj=hashing, mode="wb", mtime=0)
+            if compressed
+            else io.BufferedWriter(hashing)
+        )
+        with io.TextIOWrapper(binary, encoding="utf-8", newline="") as f:
+            writer = csv.writer(f) if args.format == "csv" else None
+            if writer:
+                writer.writerow(FIELDS)
+            for cla in iter_clas(con, since, args.batch_size):
+                record = [
+                    str(cla.id),
+                    cla.email,
+                    cla.username,
+                    cla.signed_at,
+                    str(cla.agreement_version_id),
+                ]
+                if writer:
+                    writer.writerow(record)
+                else:
+                    f.write(json.dumps(dict(zip(FIELDS, record))) + "\n")
+                rows += 1
+                progress.advance(task)
+                cursor = {"creation_time": cla.signed_at, "id": str(cla.id)}
+    partial.replace(output)
+
+    manifest = {
+        "file": output.name,
+        "format": args.format,
+        "compressed": compressed,
+        "fields": FIELDS,
+        "rows": rows,
+        "bytes": hashing.size,
+        "sha256": hashing.sha256.hexdigest(),
+        "since": since,
+        "cursor": cursor,
+        "started_at": started_at.isoformat(),
+        "finished_at": datetime.now(timezone.utc).isoformat(),
+    }
+    manifest_path = output.with_name(output.name + ".manifest.json")
+    manifest_path.write_text(json.dumps(manifest, indent=2) + "\n")
+    print(f"Exported {rows} CLAs to {output}, manifest in {manifest_path}.")
+
+
+def verify(manifest_path: Path) -> bool:
+    manifest = json.loads(manifest_path.read_text())
+    path = manifest_path.with_name(manifest["file"])
+    if file_sha256(path) != manifest["sha256"]:
+        print(f"[bold red]Checksum mismatch[/bold red] for {path}.")
+        return False
+
+    opener = gzip.open if manifest["compressed"] else open
+    with opener(path, "rt", encoding="utf-8", newline="") as f:
+        if manifest["format"] == "csv":
+            rows = sum(1 for _ in csv.reader(f)) - 1  # header
+        else:
+            rows = sum(1 for _ in f)
+    if rows != manifest["rows"]:
+        print(f"[bold red]Expected {manifest['rows']} rows[/bold red], found {rows}.")
+        return False
+    print(f"{path} matches its manifest: {rows} CLAs.")
+    return True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=Path("clas.ndjson"),
+        help="output file; compressed when the name ends with .gz",
+    )
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    parser.add_argument(
+        "--since",
+        type=Path,
+        help="manifest of a previous export: export only CLAs created after it",
+    )
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument(
+        "--verify",
+        type=Path,
+        metavar="MANIFEST",
+        help="check an export against its manifest instead of exporting",
+    )
+    args = parser.parse_args()
+
+    if args.verify:
+        raise SystemExit(0 if verify(args.verify) else 1)
+    export(args)
+
+
+if __name__ == "__main__":
+    main()
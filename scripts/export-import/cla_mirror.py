@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+
+"""
+Keep a local SQLite mirror of the CLA tables, and report on it.
+
+`sync` copies `AgreementVersion` entirely, then the
+`ContributorLicenseAgreement` rows created after the last synced one, in
+(creation_time, id) order.  `sync --full` additionally walks all CLA ids in
+both databases side by side: rows missing from EdgeDB get a tombstone
+(`deleted_at`), and rows missing from the mirror are fetched, which covers
+CLAs inserted with an older `creation_time` by `bpo_import.py`.
+
+`report` answers common questions from the mirror alone, so analytics never
+load the production database:
+
+    python3 cla_mirror.py sync
+    python3 cla_mirror.py report versions
+    python3 cla_mirror.py report daily --days 30
+    python3 cla_mirror.py report duplicate-usernames
+"""
+
+from __future__ import annotations
+
+import argparse
+from datetime import datetime, timezone
+from pathlib import Path
+import sqlite3
+from typing import Any, Iterable, Iterator
+
+import edgedb
+from rich.console import Console
+from rich.table import Table
+
+from cla_export import connect, iter_clas
+
+
+ID_BATCH_SIZE = 10_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS agreement_versions (
+    id TEXT PRIMARY KEY,
+    current INTEGER NOT NULL,
+    draft INTEGER NOT NULL,
+    creation_time TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS clas (
+    id TEXT PRIMARY KEY,
+    email TEXT NOT NULL,
+    normalized_email TEXT NOT NULL,
+    username TEXT,
+    creation_time TEXT NOT NULL,
+    agreement_version_id TEXT NOT NULL,
+    deleted_at TEXT
+);
+CREATE INDEX IF NOT EXISTS clas_creation_time ON clas (creation_time, id);
+CREATE INDEX IF NOT EXISTS clas_agreement_version_id
+    ON clas (agreement_version_id);
+CREATE INDEX IF NOT EXISTS clas_username ON clas (username);
+CREATE INDEX IF NOT EXISTS clas_normalized_email ON clas (normalized_email);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+UPSERT_CLA = """
+INSERT INTO clas (
+    id, email, normalized_email, username, creation_time, agreement_version_id
+)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET
+    email = excluded.email,
+    normalized_email = excluded.normalized_email,
+    username = excluded.username,
+    creation_time = excluded.creation_time,
+    agreement_version_id = excluded.agreement_version_id,
+    deleted_at = NULL
+"""
+
+CLAS_BY_ID_QUERY = """
+SELECT ContributorLicenseAgreement {
+    id,
+    email,
+    username,
+    signed_at := <str>.creation_time,
+    agreement_version_id := .agreement_version.id
+}
+FILTER .id IN array_unpack(<array<uuid>>$ids);
+"""
+
+
+console = Console()
+print = console.print
+
+
+def open_mirror(path: Path) -> sqlite3.Connection:
+    db = sqlite3.connect(path)
+    db.executescript(SCHEMA)
+    return db
+
+
+def get_state(db: sqlite3.Connection, key: str) -> str | None:
+    row = db.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def set_state(db: sqlite3.Connection, key: str, value: str) -> None:
+    db.execute(
+        "INSERT INTO sync_state (key, value) VALUES (?, ?) "
+        "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+        (key, value),
+    )
+
+
+def cla_row(cla: Any) -> tuple[str, ...]:
+    return (
+        str(cla.id),
+        cla.email,
+        cla.email.lower(),
+        cla.username,
+        cla.signed_at,
+        str(cla.agreement_version_id),
+    )
+
+
+def sync_versions(db: sqlite3.Connection, con: edgedb.Client) -> int:
+    versions = con.query(
+        """
+        SELECT AgreementVersion {
+            id, current, draft, created := <str>.creation_time
+        };
+        """
+    )
+    db.execute("DELETE FROM agreement_versions")
+    db.executemany(
+        "INSERT INTO agreement_versions VALUES (?, ?, ?, ?)",
+        [(str(v.id), v.current, v.draft, v.created) for v in versions],
+    )
+    return len(versions)
+
+
+def sync_new_clas(
+    db: sqlite3.Connection, con: edgedb.Client, batch_size: int
+) -> int:
+    """Copies the CLAs created after the cursor of the previous sync."""
+    cursor = None
+    if get_state(db, "cursor_id") is not None:
+        cursor = {
+            "creation_time": get_state(db, "cursor_time"),
+            "id": get_state(db, "cursor_id"),
+        }
+
+    count = 0
+    for cla in iter_clas(con, cursor, batch_size):
+        db.execute(UPSERT_CLA, cla_row(cla))
+        count += 1
+        if count % batch_size == 0:
+            # commit each page, so an interrupted sync resumes from there
+            set_state(db, "cursor_time", cla.signed_at)
+            set_state(db, "cursor_id", str(cla.id))
+            db.commit()
+    if count:
+        set_state(db, "cursor_time", cla.signed_at)
+        set_state(db, "cursor_id", str(cla.id))
+    return count
+
+
+def remote_ids(con: edgedb.Client) -> Iterator[str]:
+    after = "00000000-0000-0000-0000-000000000000"
+    while True:
+        ids = con.query(
+            """
+            SELECT ContributorLicenseAgreement.id
+            FILTER ContributorLicenseAgreement.id > <uuid>$after
+            ORDER BY ContributorLicenseAgreement.id
+            LIMIT <int64>$limit;
+            """,
+            after=after,
+            limit=ID_BATCH_SIZE,
+        )
+        yield from (str(i) for i in ids)
+        if len(ids) < ID_BATCH_SIZE:
+            return
+        after = str(ids[-1])
+
+
+def local_ids(db: sqlite3.Connection) -> Iterator[str]:
+    rows = db.execute("SELECT id FROM clas WHERE deleted_at IS NULL ORDER BY id")
+    yield from (row[0] for row in rows)
+
+
+def diff_sorted(
+    local: Iterable[str], remote: Iterable[str]
+) -> Iterator[tuple[str | None, str | None]]:
+    """Merges two sorted id streams, yielding (local_only, remote_only)."""
+    local_iter, remote_iter = iter(local), iter(remote)
+    left, right = next(local_iter, None), next(remote_iter, None)
+    while left is not None or right is not None:
+        if right is None or (left is not None and left < right):
+            yield left, None
+            left = next(local_iter, None)
+        elif left is None or right < left:
+            yield None, right
+            right = next(remote_iter, None)
+        else:
+            left, right = next(local_iter, None), next(remote_iter, None)
+
+
+def reconcile(db: sqlite3.Connection, con: edgedb.Client) -> tuple[int, int]:
+    """Tombstones rows deleted from EdgeDB and fetches rows the cursor missed."""
+    # UUIDs in canonical text form sort like EdgeDB sorts them, so both
+    # sides are streamed in the same order and compared on the fly
+    local_only: list[str] = []
+    remote_only: list[str] = []
+    for local, remote in diff_sorted(local_ids(db), remote_ids(con)):
+        if local is not None:
+            local_only.append(local)
+        elif remote is not None:
+            remote_only.append(remote)
+
+    deleted_at = datetime.now(timezone.utc).isoformat()
+
+    db.executemany(
+        "UPDATE clas SET deleted_at = ? WHERE id = ?",
+        [(deleted_at, i) for i in local_only],
+    )
+    for start in range(0, len(remote_only), ID_BATCH_SIZE):
+        ids = remote_only[start : start + ID_BATCH_SIZE]
+        for cla in con.query(CLAS_BY_ID_QUERY, ids=ids):
+            db.execute(UPSERT_CLA, cla_row(cla))
+    return len(local_only), len(remote_only)
+
+
+def sync(args: argparse.Namespace) -> None:
+    db = open_mirror(args.database)
+    print("Connecting to EdgeDB", end="... ")
+    con = connect()
+    print("connected.")
+
+    with db:
+        versions = sync_versions(db, con)
+        new_clas = sync_new_clas(db, con, args.batch_size)
+        print(f"Synced {versions} agreement versions and {new_clas} new CLAs.")
+        if args.full:
+            deleted, missed = reconcile(db, con)
+            print(f"Marked {deleted} deleted CLAs, fetched {missed} missed CLAs.")
+        set_state(db, "synced_at", datetime.now(timezone.utc).isoformat())
+
+
+def report_versions(db: sqlite3.Connection) -> list[tuple]:
+    """CLAs per agreement version."""
+    return db.execute(
+        """
+        SELECT clas.agreement_version_id, versions.current, count(*) AS total,
+            min(clas.creation_time), max(clas.creation_time)
+        FROM clas
+        LEFT JOIN agreement_versions AS versions
+            ON versions.id = clas.agreement_version_id
+        WHERE clas.deleted_at IS NULL
+        GROUP BY clas.agreement_version_id
+        ORDER BY total DESC
+        """
+    ).fetchall()
+
+
+def report_daily(db: sqlite3.Connection, days: int) -> list[tuple]:
+    """CLAs signed per day, over the last `days` days."""
+    return db.execute(
+        """
+        SELECT substr(creation_time, 1, 10) AS day, count(*)
+        FROM clas
+        WHERE deleted_at IS NULL AND creation_time >= date('now', ?)
+        GROUP BY day
+        ORDER BY day
+        """,
+        (f"-{days} days",),
+    ).fetchall()
+
+
+def report_duplicate_usernames(db: sqlite3.Connection) -> list[tuple]:
+    """GitHub usernames that signed with more than one email address."""
+    return db.execute(
+        """
+        SELECT username, count(*) AS clas, group_concat(email, ', ')
+        FROM clas
+        WHERE deleted_at IS NULL AND username IS NOT NULL AND username != ''
+        GROUP BY username
+        HAVING clas > 1
+        ORDER BY clas DESC, username
+        """
+    ).fetchall()
+
+
+REPORTS = {
+    "versions": (
+        report_versions,
+        ["Agreement version", "Current", "CLAs", "First", "Last"],
+    ),
+    "daily": (report_daily, ["Day", "CLAs"]),
+    "duplicate-usernames": (
+        report_duplicate_usernames,
+        ["Username", "CLAs", "Emails"],
+    ),
+}
+
+
+def report(args: argparse.Namespace) -> None:
+    db = open_mirror(args.database)
+    function, columns = REPORTS[args.report]
+    if args.report == "daily":
+        rows = function(db, args.days)
+        title = f"CLAs signed per day, last {args.days} days"
+    else:
+        rows = function(db)
+        title = function.__doc__.rstrip(".")
+
+    table = Table(*columns, title=title)
+    for row in rows:
+        table.add_row(*(str(value) for value in row))
+    print(table)
+    print(f"Mirror last synced at {get_state(db, 'synced_at') or 'never'}.")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database", type=Path, default=Path("clas.sqlite3"))
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    sync_parser = commands.add_parser("sync", help="update the mirror")
+    sync_parser.add_argument(
+        "--full",
+        action="store_true",
+        help="also detect deleted CLAs and CLAs inserted with an old date",
+    )
+    sync_parser.add_argument("--batch-size", type=int, default=1000)
+    sync_parser.set_defaults(handler=sync)
+
+    report_parser = commands.add_parser("report", help="query the mirror")
+    report_parser.add_argument("report", choices=sorted(REPORTS))
+    report_parser.add_argument("--days", type=int, default=30)
+    report_parser.set_defaults(handler=report)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+
+"""
+Delete CommentInfo rows older than `--older-than` days, in small batches.
+
+Each batch is one short DELETE of at most `--batch-size` rows, oldest first,
+followed by a pause at least as long as the batch took: the job never holds
+a long transaction on the serving database, and spends at most half of its
+time in it. A batch slower than `--max-batch-seconds` halves the batch size,
+fast batches let it grow back.
+
+The cutoff date and the progress so far are saved to `--state` after each
+batch, so an interrupted run resumes with the same cutoff and totals. The
+state file is removed once no rows are left to delete.
+
+Pull requests updated after their CommentInfo is deleted get a new CLA
+comment instead of an update of the previous one: pick an age well beyond
+the lifetime of pull requests.
+"""
+
+from __future__ import annotations
+
+import argparse
+from datetime import datetime, timedelta, timezone
+import json
+from pathlib import Path
+import time
+from typing import Any
+
+from rich.console import Console
+
+from cla_export import connect
+from instrumentation import instrument
+
+
+MIN_BATCH_SIZE = 10
+
+DELETE_BATCH_QUERY = """
+WITH deleted := (
+    DELETE CommentInfo
+    FILTER .creation_time < <datetime><str>$cutoff
+    ORDER BY .creation_time
+    LIMIT <int64>$limit
+)
+SELECT {
+    count := count(deleted),
+    until := <str>max(deleted.creation_time)
+};
+"""
+
+COUNT_QUERY = """
+SELECT count((
+    SELECT CommentInfo FILTER .creation_time < <datetime><str>$cutoff
+));
+"""
+
+
+console = Console()
+print = console.print
+
+
+def load_state(path: Path, older_than: float, restart: bool) -> dict[str, Any]:
+    if path.exists() and not restart:
+        state = json.loads(path.read_text())
+        print(
+            f"Resuming the run started at {state['started_at']}: "
+            f"{state['deleted']} rows deleted in {state['batches']} batches."
+        )
+        return state
+
+    now = datetime.now(timezone.utc)
+    return {
+        "cutoff": (now - timedelta(days=older_than)).isoformat(),
+        "started_at": now.isoformat(),
+        "deleted": 0,
+        "batches": 0,
+        "seconds": 0.0,
+    }
+
+
+def save_state(path: Path, state: dict[str, Any]) -> None:
+    partial = path.with_name(path.name + ".part")
+    partial.write_text(json.dumps(state, indent=2) + "\n")
+    partial.replace(path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--older-than", type=float, default=365, metavar="DAYS")
+    parser.add_argument(
+        "--batch-size", type=int, default=500, help="maximum rows per DELETE"
+    )
+    parser.add_argument("--max-batch-seconds", type=float, default=1.0)
+    parser.add_argument(
+        "--pause", type=float, default=0.5, help="minimum seconds between batches"
+    )
+    parser.add_argument(
+        "--max-batches", type=int, default=0, help="stop after this many batches"
+    )
+    parser.add_argument(
+        "--state", type=Path, default=Path("comment-retention.json")
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="ignore a saved state and compute a new cutoff",
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="only count the rows to delete"
+    )
+    args = parser.parse_args()
+
+    metrics = instrument("comment_retention")
+    state = load_state(args.state, args.older_than, args.restart)
+
+    print("Connecting to EdgeDB", end="... ")
+    with metrics.phase("connect"):
+        con = metrics.wrap(connect(), "edgedb")
+    print("connected.")
+
+    if args.dry_run:
+        total = con.query_single(COUNT_QUERY, cutoff=state["cutoff"])
+        print(f"{total} CommentInfo rows created before {state['cutoff']}.")
+        return
+
+    print(f"Deleting CommentInfo rows created before {state['cutoff']}.")
+    batch_size = args.batch_size
+    batches = 0
+    try:
+        with metrics.phase("delete"):
+            while not args.max_batches or batches < args.max_batches:
+                start = time.perf_counter()
+                result = con.query_single(
+                    DELETE_BATCH_QUERY, cutoff=state["cutoff"], limit=batch_size
+                )
+                elapsed = time.perf_counter() - start
+                batches += 1
+                state["deleted"] += result.count
+                state["batches"] += 1
+                state["seconds"] = round(state["seconds"] + elapsed, 3)
+                save_state(args.state, state)
+                print(
+                    f"Batch {state['batches']}: deleted {result.count} rows "
+                    f"created up to {result.until or '-'} in {elapsed:.3f}s."
+                )
+
+                if result.count < batch_size:
+                    args.state.unlink()
+                    print(
+                        f"Done: deleted {state['deleted']} rows in "
+                        f"{state['batches']} batches, "
+                        f"{state['seconds']:.1f}s spent deleting."
+                    )
+                    return
+
+                if elapsed > args.max_batch_seconds:
+                    batch_size = max(MIN_BATCH_SIZE, batch_size // 2)
+                elif elapsed < args.max_batch_seconds / 4:
+                    batch_size = min(args.batch_size, batch_size * 2)
+                time.sleep(max(args.pause, elapsed))
+    except KeyboardInterrupt:
+        print("Interrupted.")
+    print(
+        f"Stopped after deleting {state['deleted']} rows in "
+        f"{state['batches']} batches; run again to resume."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Timing and profiling shared by the export/import scripts.
+
+    metrics = instrument("bpo_import")
+    con = metrics.wrap(edgedb.create_client(...), "edgedb")
+    with metrics.phase("import"):
+        ...
+        with metrics.measure("strptime"):
+            ...
+
+Calls through wrapped objects are counted and timed by kind (e.g.
+`edgedb.query`, `xmlrpc.display`) into latency histograms, and phases are
+timed as a whole. At exit, a JSON summary of the run is appended as one line
+to `$CLA_METRICS_FILE` (default: `sync-metrics.jsonl`), to track sync
+performance over time.
+
+Set `CLA_PROFILE=cprofile` to also write `<script>.prof` (for `pstats` or
+snakeviz), or `CLA_PROFILE=sample` to sample the main thread every
+`$CLA_PROFILE_INTERVAL_MS` (default: 5) and write `<script>.folded`, in the
+collapsed stacks format read by flamegraph.pl and speedscope. Profiles go
+to `$CLA_PROFILE_DIR` (default: the current directory).
+"""
+
+from __future__ import annotations
+
+import atexit
+import bisect
+import collections
+import contextlib
+import cProfile
+from datetime import datetime, timezone
+import json
+import os
+from pathlib import Path
+import sys
+import threading
+import time
+from typing import Any, Iterator
+
+
+# Upper bounds of the latency histogram buckets, in milliseconds.
+BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+
+
+class Histogram:
+    """Counts durations into fixed buckets: memory doesn't grow with calls."""
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        ms = seconds * 1000
+        self.counts[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, ms)
+
+    def percentile(self, p: float) -> float:
+        """Upper bound of the bucket holding the p-th percentile, in ms."""
+        rank = p / 100 * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS_MS, self.counts):
+            seen += count
+            if seen >= rank:
+                return round(min(bound, self.max), 3)
+        return round(self.max, 3)
+
+    def summary(self) -> dict[str, Any]:
+        labels = [f"<={bound}ms" for bound in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"]
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "total_s": round(self.total, 3),
+            "mean_ms": round(self.total * 1000 / self.count, 3) if self.count else 0,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": round(self.max, 3),
+            "histogram": {
+                label: count for label, count in zip(labels, self.counts) if count
+            },
+        }
+
+
+class SamplingProfiler:
+    """Samples the stack of a thread at a fixed interval, from another thread."""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.stacks: collections.Counter[str] = collections.Counter()
+        self.thread_id = threading.get_ident()
+        self.stopped = threading.Event()
+        self.sampler = threading.Thread(target=self.run, daemon=True)
+
+    def start(self) -> None:
+        self.sampler.start()
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.sampler.join()
+
+    def run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{Path(code.co_filename).name}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def dump(self, path: Path) -> None:
+        with path.open("w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class Instrumented:
+    """Proxies an object, timing calls to its methods as `<prefix>.<name>`."""
+
+    def __init__(self, target: Any, prefix: str, metrics: Instrumentation) -> None:
+        self._target = target
+        self._prefix = prefix
+        self._metrics = metrics
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._target, name)
+        if not callable(attribute):
+            return attribute
+
+        def timed(*args: Any, **kwargs: Any) -> Any:
+            with self._metrics.measure(f"{self._prefix}.{name}"):
+                return attribute(*args, **kwargs)
+
+        return timed
+
+
+class Instrumentation:
+    def __init__(self, script: str) -> None:
+        self.script = script
+        self.started_at = datetime.now(timezone.utc)
+        self.start = time.perf_counter()
+        self.operations: dict[str, Histogram] = collections.defaultdict(Histogram)
+        self.phases: dict[str, float] = collections.defaultdict(float)
+        self.profiler: cProfile.Profile | None = None
+        self.sampler: SamplingProfiler | None = None
+
+    def wrap(self, target: Any, prefix: str) -> Any:
+        return Instrumented(target, prefix, self)
+
+    @contextlib.contextmanager
+    def measure(self, kind: str) -> Iterator[None]:
+        histogram = self.operations[kind]
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            histogram.errors += 1
+            raise
+        finally:
+            histogram.record(time.perf_counter() - start)
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] += time.perf_counter() - start
+
+    def start_profiling(self, mode: str) -> None:
+        if mode == "cprofile":
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        elif mode == "sample":
+            interval_ms = float(os.environ.get("CLA_PROFILE_INTERVAL_MS", "5"))
+            self.sampler = SamplingProfiler(interval_ms / 1000)
+            self.sampler.start()
+        elif mode:
+            raise ValueError(f"Unknown CLA_PROFILE {mode!r}: use cprofile or sample")
+
+    def stop_profiling(self) -> Path | None:
+        directory = Path(os.environ.get("CLA_PROFILE_DIR", "."))
+        if self.profiler is not None:
+            self.profiler.disable()
+            path = directory / f"{self.script}.prof"
+            self.profiler.dump_stats(path)
+            return path
+        if self.sampler is not None:
+            self.sampler.stop()
+            path = directory / f"{self.script}.folded"
+            self.sampler.dump(path)
+            return path
+        return None
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "script": self.script,
+            "started_at": self.started_at.isoformat(),
+            "duration_s": round(time.perf_counter() - self.start, 3),
+            "phases_s": {name: round(s, 3) for name, s in self.phases.items()},
+            "operations": {
+                kind: histogram.summary()
+                for kind, histogram in sorted(self.operations.items())
+            },
+        }
+
+    def finish(self) -> None:
+        profile = self.stop_profiling()
+        summary = self.summary()
+        if profile is not None:
+            summary["profile"] = str(profile)
+        path = Path(os.environ.get("CLA_METRICS_FILE", "sync-metrics.jsonl"))
+        with path.open("a") as f:
+            f.write(json.dumps(summary) + "\n")
+        print(f"Metrics of this run appended to {path}.", file=sys.stderr)
+
+
+def instrument(script: str) -> Instrumentation:
+    """Starts instrumenting the current run; the summary is written at exit."""
+    metrics = Instrumentation(script)
+    metrics.start_profiling(os.environ.get("CLA_PROFILE", ""))
+    atexit.register(metrics.finish)
+    return metrics
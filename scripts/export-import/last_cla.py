@@ -15,6 +15,8 @@ import edgedb
 from rich.console import Console
 from rich.progress import Progress
 
+from instrumentation import instrument
+
 
 load_dotenv()
 
@@ -24,21 +26,27 @@ EDGEDB_PASSWORD = urlparse(DATABASE_URL).password
 
 console = Console()
 print = console.print
+metrics = instrument("last_cla")
 
 
 print("Connecting to EdgeDB", end="... ")
-con = edgedb.create_client(
-    host="localhost",
-    user="edgedb",
-    database="edgedb",
-    password=EDGEDB_PASSWORD,
-)
+with metrics.phase("connect"):
+    con = metrics.wrap(
+        edgedb.create_client(
+            host="localhost",
+            user="edgedb",
+            database="edgedb",
+            password=EDGEDB_PASSWORD,
+        ),
+        "edgedb",
+    )
 print("connected.")
 
 
 seen = set()
 
 while True:
+    # metrics are written when interrupted with Ctrl+C
     result = con.query(
         """
         SELECT ContributorLicenseAgreement {
@@ -52,7 +60,7 @@ while True:
             continue
         print(f"{elem.email} - {elem.username} on {elem.creation_time}")
         seen.add(elem.email)
-    with Progress(console=console, transient=True) as progress:
+    with metrics.phase("wait"), Progress(console=console, transient=True) as progress:
         task = progress.add_task("Waiting", total=60)
         for _ in range(60):
             progress.advance(task)
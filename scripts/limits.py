@@ -0,0 +1,346 @@
+#!/usr/bin/env python3.7
+# This file runs on Debian Buster and needs to be Python 3.7 compatible.
+
+"""Resource limits for processes spawned by Minivisor.
+
+Limits are applied by the supervisor to each child by PID, right after it's
+spawned:
+
+- rlimits (address space, open files), which fail the spawn if refused;
+- nice level, I/O scheduling class and CPU affinity, for all its threads;
+- cgroup v2 `memory.max` and `cpu.weight`, in a cgroup created for the child
+  next to the supervisor's own, where the kernel and container allow it.
+
+They're not applied between fork and exec with `preexec_fn`: Python code
+running in a forked child can deadlock when the parent has other threads,
+like the log writers of Minivisor. The cost is a short window after exec
+where the child runs without its limits; processes it starts in that window
+don't inherit them.
+
+I/O priority and cgroups are best effort: what a child actually got is read
+back from the kernel by `describe()`.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import dataclasses
+import os
+import platform
+import resource
+
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+
+# ioprio_set and ioprio_get have no wrapper in the standard library.
+# arch/*/include/uapi/asm/unistd.h
+IOPRIO_SYSCALLS = {"x86_64": (251, 252), "aarch64": (30, 31), "i686": (289, 290)}
+IOPRIO_WHO_PROCESS = 1  # include/uapi/linux/ioprio.h
+IOPRIO_CLASS_SHIFT = 13
+IOPRIO_CLASSES = {"none": 0, "realtime": 1, "best-effort": 2, "idle": 3}
+
+SIZE_SUFFIXES = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+
+def parse_size(value: str) -> int:
+    """Parse `512M`-style sizes, in bytes."""
+    value = value.strip().upper().rstrip("B")
+    if value and value[-1] in SIZE_SUFFIXES:
+        return int(float(value[:-1]) * SIZE_SUFFIXES[value[-1]])
+    return int(value)
+
+
+def parse_cpus(value: str) -> set[int]:
+    """Parse `0-3,6`-style CPU lists."""
+    cpus = set()
+    for part in value.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        cpus.update(range(int(first), int(last or first) + 1))
+    return cpus
+
+
+def format_cpus(cpus: set[int]) -> str:
+    ranges = []
+    for cpu in sorted(cpus):
+        if ranges and ranges[-1][1] == cpu - 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ",".join(str(a) if a == b else f"{a}-{b}" for a, b in ranges)
+
+
+def format_size(size: int) -> str:
+    for suffix in "TGMK":
+        if size >= SIZE_SUFFIXES[suffix] and size % SIZE_SUFFIXES[suffix] == 0:
+            return f"{size // SIZE_SUFFIXES[suffix]}{suffix}"
+    return str(size)
+
+
+def parse_ionice(value: str) -> int:
+    """Parse `class[:level]`, e.g. `idle` or `best-effort:7`, to an ioprio."""
+    name, _, level = value.partition(":")
+    if name not in IOPRIO_CLASSES:
+        raise ValueError(f"Unknown I/O scheduling class {name!r} in {value!r}")
+    if not 0 <= int(level or 0) <= 7:
+        raise ValueError(f"I/O priority level must be 0-7 in {value!r}")
+    return IOPRIO_CLASSES[name] << IOPRIO_CLASS_SHIFT | int(level or 0)
+
+
+def format_ionice(ioprio: int) -> str:
+    names = {number: name for name, number in IOPRIO_CLASSES.items()}
+    io_class = names.get(ioprio >> IOPRIO_CLASS_SHIFT, "?")
+    if io_class in ("none", "idle"):
+        return io_class
+    return f"{io_class}:{ioprio & 0xFF}"
+
+
+def ioprio_syscall(get: bool, pid: int, ioprio: int = 0) -> int:
+    """Call ioprio_get or ioprio_set, returning -1 where it's not available."""
+    numbers = IOPRIO_SYSCALLS.get(platform.machine())
+    if numbers is None:
+        return -1
+    if get:
+        return _libc.syscall(numbers[1], IOPRIO_WHO_PROCESS, pid)
+    return _libc.syscall(numbers[0], IOPRIO_WHO_PROCESS, pid, ioprio)
+
+
+_libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+
+
+@dataclasses.dataclass
+class Limits:
+    address_space: int | None = None  # RLIMIT_AS, in bytes
+    open_files: int | None = None  # RLIMIT_NOFILE
+    nice: int | None = None  # -20 to 19
+    ionice: str | None = None  # `class[:level]`, e.g. `best-effort:7`
+    cpus: set[int] | None = None  # CPU affinity
+    memory_max: int | None = None  # cgroup memory.max, in bytes
+    cpu_weight: int | None = None  # cgroup cpu.weight, 1 to 10000, default 100
+
+    @classmethod
+    def from_env(cls, name: str, **defaults: object) -> Limits:
+        """Read limits from `MINIVISOR_<NAME>_<FIELD>`, e.g. `MINIVISOR_WEB_NICE`.
+
+        Sizes accept K, M, G, and T suffixes, and CPUs are lists like `0-3,6`.
+        """
+        values = dict(defaults)
+        for field in dataclasses.fields(cls):
+            env = f"MINIVISOR_{name.upper()}_{field.name.upper()}"
+            value = os.environ.get(env)
+            if not value:
+                continue
+            if field.name in ("address_space", "memory_max"):
+                values[field.name] = parse_size(value)
+            elif field.name == "cpus":
+                values[field.name] = parse_cpus(value)
+            elif field.name == "ionice":
+                values[field.name] = value
+            else:
+                values[field.name] = int(value)
+        return cls(**values)  # type: ignore
+
+    def __post_init__(self) -> None:
+        # Fail on bad settings before spawning anything.
+        if self.ionice is not None:
+            parse_ionice(self.ionice)
+
+    def __bool__(self) -> bool:
+        return any(
+            getattr(self, field.name) is not None
+            for field in dataclasses.fields(self)
+        )
+
+    @property
+    def uses_cgroup(self) -> bool:
+        return self.memory_max is not None or self.cpu_weight is not None
+
+    def apply(self, pid: int, cgroup: str | None) -> list[str]:
+        """Apply the limits to a running process.
+
+        Refused rlimits, nice levels, and CPU affinities raise OSError; the
+        errors of best-effort settings are returned instead.
+        """
+        errors = []
+        if cgroup is not None:
+            try:
+                with open(os.path.join(cgroup, "cgroup.procs"), "w") as f:
+                    f.write(str(pid))
+            except OSError as exc:
+                errors.append(f"cannot move PID {pid} to {cgroup}: {exc}")
+        if self.address_space is not None:
+            resource.prlimit(
+                pid, resource.RLIMIT_AS, (self.address_space, self.address_space)
+            )
+        if self.open_files is not None:
+            resource.prlimit(
+                pid, resource.RLIMIT_NOFILE, (self.open_files, self.open_files)
+            )
+
+        # Priorities and affinity are per thread, and the child might have
+        # started some already.
+        ioprio = parse_ionice(self.ionice) if self.ionice is not None else None
+        for tid in threads(pid):
+            try:
+                if self.nice is not None:
+                    os.setpriority(os.PRIO_PROCESS, tid, self.nice)
+                if self.cpus is not None:
+                    os.sched_setaffinity(tid, self.cpus)
+            except ProcessLookupError:
+                continue  # the thread exited
+            if ioprio is not None and ioprio_syscall(False, tid, ioprio) < 0:
+                errors.append(
+                    f"cannot set the I/O priority of {tid}: "
+                    f"{os.strerror(ctypes.get_errno())}"
+                )
+                ioprio = None
+        return errors
+
+
+def threads(pid: int) -> list[int]:
+    try:
+        return sorted(int(tid) for tid in os.listdir(f"/proc/{pid}/task"))
+    except OSError:
+        return [pid]
+
+
+class Cgroups:
+    """Creates a cgroup v2 for each child with cgroup limits, if possible.
+
+    A cgroup can only enable controllers for its children while it has no
+    processes of its own, so the supervisor first moves itself and the
+    children it already has to a `minivisor` leaf next to the cgroups of the
+    new children. Any failure along the way, like other processes sharing
+    the supervisor's cgroup, is reported once and cgroup limits are ignored
+    from then on.
+    """
+
+    def __init__(self, root: str = CGROUP_ROOT) -> None:
+        self.root = root
+        self.base: str | None = None
+        self.error: str | None = None
+        self.created: list[str] = []
+
+    def setup(self, pids: list[int]) -> str | None:
+        """Prepare the supervisor's cgroup, returning the reason if impossible.
+
+        `pids` are the children already running in the supervisor's cgroup.
+        """
+        if self.base is not None or self.error is not None:
+            return self.error
+
+        try:
+            with open("/proc/self/cgroup") as f:
+                lines = [line for line in f if line.startswith("0::")]
+            if not lines or not os.path.exists(
+                os.path.join(self.root, "cgroup.controllers")
+            ):
+                raise OSError("cgroup v2 is not available")
+            base = os.path.join(self.root, lines[0][3:].strip().lstrip("/"))
+            with open(os.path.join(base, "cgroup.controllers")) as f:
+                available = f.read().split()
+            wanted = [c for c in ("cpu", "memory") if c in available]
+            if not wanted:
+                raise OSError("the cpu and memory controllers are not delegated")
+
+            leaf = os.path.join(base, "minivisor")
+            os.makedirs(leaf, exist_ok=True)
+            for pid in [os.getpid()] + pids:
+                with open(os.path.join(leaf, "cgroup.procs"), "w") as f:
+                    f.write(str(pid))
+            with open(os.path.join(base, "cgroup.subtree_control"), "w") as f:
+                f.write(" ".join(f"+{c}" for c in wanted))
+        except OSError as exc:
+            self.error = f"cgroup limits disabled: {exc}"
+            return self.error
+
+        self.base = base
+        return None
+
+    def create(self, name: str, limits: Limits, pids: list[int]) -> str | None:
+        """Create a cgroup for a child, returning its path."""
+        if not limits.uses_cgroup or self.setup(pids) is not None:
+            return None
+
+        assert self.base is not None
+        path = os.path.join(self.base, name)
+        n = 1
+        while path in self.created:
+            n += 1
+            path = os.path.join(self.base, f"{name}-{n}")
+        os.makedirs(path, exist_ok=True)
+        self.created.append(path)
+        if limits.memory_max is not None:
+            with open(os.path.join(path, "memory.max"), "w") as f:
+                f.write(str(limits.memory_max))
+        if limits.cpu_weight is not None:
+            with open(os.path.join(path, "cpu.weight"), "w") as f:
+                f.write(str(limits.cpu_weight))
+        return path
+
+    def remove(self) -> None:
+        """Remove the cgroups of children, which must have exited."""
+        for path in reversed(self.created):
+            try:
+                os.rmdir(path)
+            except OSError:
+                pass
+        self.created = []
+
+
+def read_first_line(path: str) -> str | None:
+    try:
+        with open(path) as f:
+            return f.readline().strip()
+    except OSError:
+        return None
+
+
+def describe(pid: int) -> str:
+    """The limits in effect for a process, as reported by the kernel."""
+
+    def rlimit(kind: int, size: bool) -> str:
+        try:
+            soft, _ = resource.prlimit(pid, kind)
+        except (OSError, ValueError):
+            return "?"
+        if soft == resource.RLIM_INFINITY:
+            return "unlimited"
+        return format_size(soft) if size else str(soft)
+
+    parts = [
+        f"as={rlimit(resource.RLIMIT_AS, size=True)}",
+        f"nofile={rlimit(resource.RLIMIT_NOFILE, size=False)}",
+    ]
+    try:
+        parts.append(f"nice={os.getpriority(os.PRIO_PROCESS, pid)}")
+    except OSError:
+        parts.append("nice=?")
+    ioprio = ioprio_syscall(True, pid)
+    parts.append(f"ionice={format_ionice(ioprio) if ioprio >= 0 else '?'}")
+    try:
+        parts.append(f"cpus={format_cpus(os.sched_getaffinity(pid))}")
+    except OSError:
+        parts.append("cpus=?")
+
+    cgroup = None
+    try:
+        with open(f"/proc/{pid}/cgroup") as f:
+            for line in f:
+                if line.startswith("0::"):
+                    cgroup = line[3:].strip()
+    except OSError:
+        pass
+    if cgroup is not None:
+        parts.append(f"cgroup={cgroup}")
+        path = os.path.join(CGROUP_ROOT, cgroup.lstrip("/"))
+        for name in ("memory.max", "cpu.weight"):
+            value = read_first_line(os.path.join(path, name))
+            if value is not None:
+                if name == "memory.max" and value.isdigit():
+                    value = format_size(int(value))
+                parts.append(f"{name}={value}")
+    return " ".join(parts)
@@ -7,10 +7,17 @@ from types import FrameType
 
 import asyncio
 import asyncio.subprocess
+import collections
 import dataclasses
+import gzip
+import os
+import queue
 import shutil
 import signal
 import sys
+import threading
+
+from limits import Cgroups, Limits, describe
 
 
 if TYPE_CHECKING:
@@ -66,6 +73,104 @@ def make_prefix(
     return f"{cmdline}{padding}  {kind} "
 
 
+class RotatingLogWriter:
+    """Appends lines to a file from a background thread.
+
+    The event loop only puts lines on a queue, so slow disk I/O never stalls
+    log forwarding: if the disk can't keep up, lines are dropped from the file
+    (and counted) instead. When the file grows past `max_bytes`, it's
+    compressed to `<path>.1.gz`, shifting older files up to
+    `<path>.<backups>.gz`.
+    """
+
+    def __init__(
+        self, path: str, max_bytes: int, backups: int, queue_size: int = 10000
+    ) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.dropped = 0
+        self.queue: queue.Queue[bytes | None] = queue.Queue(maxsize=queue_size)
+        self.thread = threading.Thread(
+            target=self.run, name=f"log {os.path.basename(path)}", daemon=True
+        )
+        self.thread.start()
+
+    def write(self, line: bytes) -> None:
+        try:
+            self.queue.put_nowait(line)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self) -> None:
+        """Flush pending lines and stop the thread; this blocks."""
+        if not self.thread.is_alive():
+            # It failed writing, so nothing drains the queue anymore.
+            self.dropped += self.queue.qsize()
+            return
+        try:
+            self.queue.put(None, timeout=10.0)
+        except queue.Full:
+            return
+        self.thread.join(timeout=10.0)
+
+    def run(self) -> None:
+        try:
+            f = open(self.path, "ab")
+        except OSError as exc:
+            print(f"Cannot write {self.path}: {exc}", file=sys.stderr, flush=True)
+            return
+        try:
+            size = f.tell()
+            while True:
+                line = self.queue.get()
+                if line is None:
+                    return
+                f.write(line)
+                size += len(line)
+                if self.queue.empty():
+                    f.flush()
+                if size >= self.max_bytes:
+                    f.close()
+                    self.rotate()
+                    f = open(self.path, "ab")
+                    size = 0
+        except OSError as exc:
+            print(f"Cannot write {self.path}: {exc}", file=sys.stderr, flush=True)
+        finally:
+            f.close()
+
+    def rotate(self) -> None:
+        if self.backups > 0:
+            for i in range(self.backups - 1, 0, -1):
+                older = f"{self.path}.{i}.gz"
+                if os.path.exists(older):
+                    os.replace(older, f"{self.path}.{i + 1}.gz")
+            partial = f"{self.path}.1.gz.tmp"
+            with open(self.path, "rb") as src, gzip.open(partial, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.replace(partial, f"{self.path}.1.gz")
+        with open(self.path, "wb"):
+            pass  # truncate
+
+
+class ChildLog:
+    """The last lines of output of a child process, and optionally its log file."""
+
+    def __init__(
+        self, cmdline: str, tail_lines: int, writer: RotatingLogWriter | None
+    ) -> None:
+        self.cmdline = cmdline
+        self.tail: collections.deque[bytes] = collections.deque(maxlen=tail_lines)
+        self.writer = writer
+        self.followers: list[asyncio.Task[None]] = []
+
+    def add(self, line: bytes) -> None:
+        self.tail.append(line)
+        if self.writer is not None:
+            self.writer.write(line + b"\n")
+
+
 def censor(s: str) -> str:
     if s.startswith("--backend-dsn="):
         return "--backend-dsn=********"
@@ -81,18 +186,57 @@ class Minivisor:
     It only gathers output from subprocesses and closes all if any of them dies.
     It passes SIGHUP, SIGINT, and SIGTERM but it doesn't multiplex sockets or do
     anything else fancy.
+
+    The last `tail_lines` lines of each child are kept in memory and displayed
+    again, together, when it dies or fails its health checks. When `log_dir`
+    is set, the output of each child is also written to its own rotating log
+    file there.
+
+    Daemons can be given resource `Limits`. The limits in effect are displayed
+    when they start, and for all children on SIGUSR1.
     """
 
     processes: dict[str, asyncio.subprocess.Process]
     waiters: list[asyncio.Task[int]]
     followers: list[asyncio.Task[None]]
+    logs: list[ChildLog]
+    cgroups: Cgroups
     out: asyncio.Queue[bytes]
     display: asyncio.Task[None]
+    tail_lines: int
+    log_dir: str | None
+    log_max_bytes: int
+    log_backups: int
+
+    def __init__(
+        self,
+        tail_lines: int | None = None,
+        log_dir: str | None = None,
+        log_max_bytes: int | None = None,
+        log_backups: int | None = None,
+    ):
+        if tail_lines is None:
+            tail_lines = int(os.environ.get("MINIVISOR_TAIL_LINES", "200"))
+        if log_dir is None:
+            log_dir = os.environ.get("MINIVISOR_LOG_DIR") or None
+        if log_max_bytes is None:
+            log_max_bytes = int(
+                os.environ.get("MINIVISOR_LOG_MAX_BYTES", str(10 * 1024 * 1024))
+            )
+        if log_backups is None:
+            log_backups = int(os.environ.get("MINIVISOR_LOG_BACKUPS", "5"))
+        self.tail_lines = tail_lines
+        self.log_dir = log_dir
+        self.log_max_bytes = log_max_bytes
+        self.log_backups = log_backups
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
 
-    def __init__(self):
         self.processes = {}
         self.waiters = []
         self.followers = []
+        self.logs = []
+        self.cgroups = Cgroups()
         self.out = asyncio.Queue()
         self.display = asyncio.create_task(self.display_out())
         self._is_shutting_down = False
@@ -101,6 +245,7 @@ class Minivisor:
         loop.add_signal_handler(signal.SIGHUP, self.signal_passer)
         loop.add_signal_handler(signal.SIGINT, self.signal_passer)
         loop.add_signal_handler(signal.SIGTERM, self.signal_passer)
+        loop.add_signal_handler(signal.SIGUSR1, self.status_reporter)
 
     def signal_passer(self, sig: int = 0, frame: FrameType | None = None) -> None:
         if not sig:
@@ -109,14 +254,31 @@ class Minivisor:
         for proc in reversed(self.processes):
             proc.send_signal(sig)
 
+    def status_reporter(self) -> None:
+        asyncio.create_task(self.report_status())
+
+    async def report_status(self) -> None:
+        """Display the state and the effective limits of all children."""
+        for cmdline, proc in self.processes.items():
+            prefix = make_prefix(cmdline)
+            if proc.returncode is not None:
+                status = f"exited with status code {proc.returncode}"
+            else:
+                status = f"running, limits: {describe(proc.pid)}"
+            await self.out.put(f"{prefix}PID {proc.pid} {status}".encode("utf8"))
+
     async def spawn(
         self,
         *args: str,
         with_healthcheck: SimpleCoroutineFunction | None = None,
         grace_period: float = 10.0,
         sleep_period: float = 60.0,
+        limits: Limits | None = None,
     ) -> None:
-        """Spawn a new process with `exec` and wait for initial healthcheck to pass."""
+        """Spawn a new process with `exec` and wait for initial healthcheck to pass.
+
+        `limits` are applied to the new process as soon as it's spawned.
+        """
 
         exe = shutil.which(args[0])
         if not exe:
@@ -126,28 +288,54 @@ class Minivisor:
         prefix_str = make_prefix(cmdline)
         prefix_out = make_prefix(cmdline, out=True).encode()
         prefix_err = make_prefix(cmdline, err=True).encode()
+        log = self.open_log(args[0], cmdline)
+        limits = limits or Limits()
+        cgroup = None
+        if limits.uses_cgroup:
+            cgroup = self.cgroups.create(
+                os.path.basename(args[0]),
+                limits,
+                [p.pid for p in self.processes.values()],
+            )
+            if cgroup is None:
+                await self.emit(log, prefix_err + str(self.cgroups.error).encode())
         proc = await asyncio.create_subprocess_exec(
             exe,
             *args[1:],
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE,
         )
-        await self.out.put(
-            f"{prefix_str}PID {proc.pid} spawned daemon '{cmdline}'".encode("utf8")
+        await self.emit(
+            log, f"{prefix_str}PID {proc.pid} spawned daemon '{cmdline}'".encode("utf8")
+        )
+        if limits:
+            try:
+                errors = limits.apply(proc.pid, cgroup)
+            except OSError as exc:
+                await self.emit(
+                    log, prefix_err + f"Cannot apply {limits}: {exc}".encode()
+                )
+                await gracefully_close(proc, cmdline)
+                raise
+            for error in errors:
+                await self.emit(log, prefix_err + error.encode())
+        await self.emit(
+            log, f"{prefix_str}PID {proc.pid} limits: {describe(proc.pid)}".encode()
         )
         initial_pass = asyncio.Future()
         waiter_task = asyncio.create_task(
             self.check_health(
                 proc,
-                cmdline,
+                log,
                 with_healthcheck or empty_healthcheck,
                 initial_pass=initial_pass,
                 grace_period=grace_period,
                 sleep_period=sleep_period,
             )
         )
-        stdout_task = asyncio.create_task(self.follow(prefix_out, proc.stdout))
-        stderr_task = asyncio.create_task(self.follow(prefix_err, proc.stderr))
+        stdout_task = asyncio.create_task(self.follow(prefix_out, proc.stdout, log))
+        stderr_task = asyncio.create_task(self.follow(prefix_err, proc.stderr, log))
+        log.followers = [stdout_task, stderr_task]
         self.processes[cmdline] = proc
         self.waiters.append(waiter_task)
         self.followers.append(stdout_task)
@@ -187,11 +375,14 @@ class Minivisor:
             stderr=asyncio.subprocess.PIPE,
             stdin=asyncio.subprocess.PIPE,
         )
-        await self.out.put(
-            f"{prefix_str}PID {proc.pid} running command '{cmdline}'".encode("utf8")
+        log = self.open_log(args[0], cmdline)
+        await self.emit(
+            log,
+            f"{prefix_str}PID {proc.pid} running command '{cmdline}'".encode("utf8"),
         )
-        stdout_task = asyncio.create_task(self.follow(prefix_out, proc.stdout))
-        stderr_task = asyncio.create_task(self.follow(prefix_err, proc.stderr))
+        stdout_task = asyncio.create_task(self.follow(prefix_out, proc.stdout, log))
+        stderr_task = asyncio.create_task(self.follow(prefix_err, proc.stderr, log))
+        log.followers = [stdout_task, stderr_task]
         try:
             try:
                 if input is not None:
@@ -215,6 +406,7 @@ class Minivisor:
             await self.out.put(
                 prefix_err + b"Return code isn't zero: " + f"{return_code}".encode()
             )
+            await self.dump_tail(log, f"exiting with status code {return_code}")
             await self.shutdown()
             raise RuntimeError("Cannot continue without this command succeeding")
 
@@ -235,7 +427,52 @@ class Minivisor:
             sys.stdout.buffer.write(line)
             sys.stdout.flush()
 
-    async def follow(self, prefix: bytes, s: asyncio.StreamReader) -> None:
+    async def emit(self, log: ChildLog, line: bytes) -> None:
+        """Display a line of a child process, remembering it in its log."""
+        log.add(line)
+        await self.out.put(line)
+
+    def open_log(self, name: str, cmdline: str) -> ChildLog:
+        writer = None
+        if self.log_dir:
+            base = os.path.basename(name)
+            path = os.path.join(self.log_dir, f"{base}.log")
+            used = {log.writer.path for log in self.logs if log.writer}
+            n = 1
+            while path in used:
+                n += 1
+                path = os.path.join(self.log_dir, f"{base}-{n}.log")
+            writer = RotatingLogWriter(path, self.log_max_bytes, self.log_backups)
+        # Each child gets its own log, even when a command runs twice.
+        log = ChildLog(cmdline, self.tail_lines, writer)
+        self.logs.append(log)
+        return log
+
+    async def dump_tail(self, log: ChildLog, reason: str) -> None:
+        """Display again the last lines of a child that exited abnormally.
+
+        By then they're usually interleaved with the output of other children
+        or lost from the log drain, so they're shown again in one block.
+        """
+        # Let the followers read what the process wrote before dying.
+        pending = [f for f in log.followers if not f.done()]
+        if pending:
+            await asyncio.wait(pending, timeout=2.0)
+        if not log.tail:
+            return
+
+        prefix = make_prefix(log.cmdline, err=True).encode()
+        await self.out.put(
+            prefix
+            + f"Last {len(log.tail)} lines of output before {reason}:".encode()
+        )
+        for line in list(log.tail):
+            await self.out.put(b"  | " + line)
+        await self.out.put(prefix + b"End of the last lines of output.")
+
+    async def follow(
+        self, prefix: bytes, s: asyncio.StreamReader, log: ChildLog
+    ) -> None:
         """Generates lines."""
         accu = prefix
         while not s.at_eof():
@@ -243,7 +480,7 @@ class Minivisor:
                 line = await asyncio.wait_for(s.readuntil(b"\n"), timeout=1.0)
                 for li in line.splitlines():
                     if li.strip():
-                        await self.out.put(accu + li)
+                        await self.emit(log, accu + li)
                         accu = prefix
             except asyncio.LimitOverrunError:
                 # a lot of characters without a newline; let's just accumulate them
@@ -254,11 +491,12 @@ class Minivisor:
             except asyncio.IncompleteReadError as ire:
                 # reached EOF without a newline; let's display what we got and exit
                 if ire.partial:
-                    await self.out.put(accu + ire.partial)
+                    await self.emit(log, accu + ire.partial)
                 return
             except asyncio.CancelledError:
                 # follow() is being cancelled, let's flush what we got so far
                 if accu != prefix:
+                    log.add(accu)
                     try:
                         self.out.put_nowait(accu)
                     except asyncio.QueueFull:
@@ -277,12 +515,26 @@ class Minivisor:
         for cmdline, proc in reversed(list(self.processes.items())):
             # Sic, serially close in reverse order.
             await gracefully_close(proc, cmdline=cmdline)
+        self.cgroups.remove()
 
         # At this point all followers should be finished but let's ensure that.
         for follower in self.followers:
             follower.cancel()
         await asyncio.wait(self.followers, timeout=2.0)
 
+        # Log files are flushed by their threads, without blocking the loop.
+        loop = asyncio.get_event_loop()
+        for log in self.logs:
+            if log.writer is None:
+                continue
+            await loop.run_in_executor(None, log.writer.close)
+            if log.writer.dropped:
+                await self.out.put(
+                    make_prefix(log.cmdline, err=True).encode()
+                    + f"{log.writer.dropped} lines dropped from "
+                    f"{log.writer.path}".encode()
+                )
+
         # Finally we can close our output queue display.
         self.display.cancel()
         await asyncio.wait([self.display], timeout=2.0)
@@ -290,12 +542,12 @@ class Minivisor:
     async def is_unhealthy(
         self,
         proc: asyncio.subprocess.Process,
-        cmdline: str,
+        log: ChildLog,
         hc: SimpleCoroutineFunction,
     ) -> bool:
         """Return True if healthcheck failed."""
 
-        prefix = make_prefix(cmdline, err=True)
+        prefix = make_prefix(log.cmdline, err=True)
         failed = False
         try:
             await hc()
@@ -304,13 +556,13 @@ class Minivisor:
             for line in str(exc).splitlines():
                 if line.strip():
                     line = "Health: " + prefix + line
-                    await self.out.put(line.encode())
+                    await self.emit(log, line.encode())
         return failed or proc.returncode is not None
 
     async def check_health(
         self,
         proc: asyncio.subprocess.Process,
-        cmdline: str,
+        log: ChildLog,
         hc: SimpleCoroutineFunction,
         grace_period: float = 10.0,
         sleep_period: float = 60.0,
@@ -319,7 +571,7 @@ class Minivisor:
         failures = 0
         await asyncio.sleep(grace_period)
         while True:
-            if await self.is_unhealthy(proc, cmdline, hc):
+            if await self.is_unhealthy(proc, log, hc):
                 failures += 1
             else:
                 if initial_pass is not None:
@@ -327,7 +579,8 @@ class Minivisor:
                     initial_pass = None
                 failures = 0
             if failures == 3:
-                await gracefully_close(proc, cmdline)
+                await gracefully_close(proc, log.cmdline)
+                await self.dump_tail(log, "failing 3 health checks")
                 if initial_pass is not None:
                     initial_pass.set_result(False)
                     initial_pass = None
@@ -335,6 +588,9 @@ class Minivisor:
             try:
                 sleep_sec = sleep_period if initial_pass is None else grace_period
                 await asyncio.wait_for(proc.wait(), timeout=sleep_sec)
+                await self.dump_tail(
+                    log, f"exiting with status code {proc.returncode}"
+                )
                 if initial_pass is not None:
                     initial_pass.set_result(False)
                     initial_pass = None
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3.7
+# This file runs on Debian Buster and needs to be Python 3.7 compatible.
+from __future__ import annotations
+
+import asyncio
+import collections
+import math
+import os
+import time
+
+
+class LatencyHistogram:
+    """A rolling window of the most recent probe latencies, in milliseconds."""
+
+    def __init__(self, size: int = 20) -> None:
+        self.samples: collections.deque[float] = collections.deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+    def record(self, latency_ms: float) -> None:
+        self.samples.append(latency_ms)
+
+    def percentile(self, p: float) -> float:
+        """Nearest-rank percentile of the current window; 0.0 if it's empty."""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        rank = max(1, math.ceil(p / 100 * len(ordered)))
+        return ordered[rank - 1]
+
+    def summary(self) -> str:
+        return (
+            f"p50={self.percentile(50):.0f}ms p95={self.percentile(95):.0f}ms "
+            f"max={self.percentile(100):.0f}ms over {len(self)} probes"
+        )
+
+
+class HTTPHealthcheck:
+    """End-to-end healthcheck of the Next.js server through `/api/health`.
+
+    Each probe opens a new connection: probes are further apart than the 5s
+    keep-alive timeout of Node's HTTP server, so a kept-alive connection would
+    be closed by the server between probes anyway, and over loopback the TCP
+    setup is negligible next to the SLO.
+
+    Besides failing on connection errors and non-200 responses, the probe
+    fails when the p95 latency of the rolling window breaches `p95_slo_ms`: a
+    wedged event loop still has a PID and still accepts connections, it just
+    stops answering.
+
+    Only a probe that is itself slower than the SLO can fail on the p95: slow
+    samples stay in the window long after a brief stall, and a server that
+    recovered shouldn't keep failing until they age out.
+    """
+
+    def __init__(
+        self,
+        port: int,
+        host: str = "127.0.0.1",
+        path: str = "/api/health",
+        timeout: float = 5.0,
+        p95_slo_ms: float | None = None,
+        window: int | None = None,
+        min_samples: int = 5,
+    ) -> None:
+        if p95_slo_ms is None:
+            p95_slo_ms = float(os.environ.get("WEB_HEALTHCHECK_P95_SLO_MS", "2000"))
+        if window is None:
+            window = int(os.environ.get("WEB_HEALTHCHECK_WINDOW", "20"))
+        self.host = host
+        self.port = port
+        self.path = path
+        self.timeout = timeout
+        self.p95_slo_ms = p95_slo_ms
+        self.min_samples = min_samples
+        self.latency = LatencyHistogram(window)
+
+    async def __call__(self) -> None:
+        start = time.monotonic()
+        try:
+            status, body = await asyncio.wait_for(self.request(), self.timeout)
+        except asyncio.TimeoutError:
+            # A timeout is the worst latency we can observe; record it as such.
+            self.latency.record(self.timeout * 1000)
+            raise RuntimeError(
+                f"GET {self.path} timed out after {self.timeout:.1f}s "
+                f"({self.latency.summary()})"
+            )
+        except Exception as e:
+            raise RuntimeError(f"GET {self.path} failed: {type(e).__name__} {e}")
+
+        latency_ms = (time.monotonic() - start) * 1000
+        self.latency.record(latency_ms)
+
+        if status != 200:
+            raise RuntimeError(f"GET {self.path} returned HTTP {status}")
+
+        if b'"alive":true' not in body.replace(b" ", b""):
+            raise RuntimeError(f"GET {self.path} returned unexpected body: {body!r}")
+
+        p95 = self.latency.percentile(95)
+        if (
+            len(self.latency) >= self.min_samples
+            and p95 > self.p95_slo_ms
+            and latency_ms > self.p95_slo_ms
+        ):
+            raise RuntimeError(
+                f"p95 latency breaches the SLO of {self.p95_slo_ms:.0f}ms: "
+                f"{self.latency.summary()}"
+            )
+
+    async def request(self) -> tuple[int, bytes]:
+        """Send one GET on a new connection, return status and body."""
+
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            return await self.exchange(reader, writer)
+        finally:
+            writer.close()
+
+    async def exchange(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> tuple[int, bytes]:
+        writer.write(
+            f"GET {self.path} HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\n"
+            "Accept: application/json\r\n"
+            "Connection: close\r\n"
+            "\r\n".encode("ascii")
+        )
+        await writer.drain()
+
+        status_line = await reader.readuntil(b"\r\n")
+        status = int(status_line.split(b" ", 2)[1])
+        headers: dict[bytes, bytes] = {}
+        while True:
+            line = await reader.readuntil(b"\r\n")
+            if line == b"\r\n":
+                break
+            name, _, value = line.partition(b":")
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get(b"transfer-encoding", b"").lower() == b"chunked":
+            body = b""
+            while True:
+                size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+                chunk = await reader.readexactly(size + 2)
+                if size == 0:
+                    break
+                body += chunk[:-2]
+        elif b"content-length" in headers:
+            body = await reader.readexactly(int(headers[b"content-length"]))
+        else:
+            # No framing information: the server will close the connection.
+            body = await reader.read()
+        return status, body
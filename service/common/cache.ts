@@ -0,0 +1,98 @@
+interface CacheEntry<V> {
+  value: V;
+  expiresAt: number;
+}
+
+export interface CacheStats {
+  size: number;
+  maxSize: number;
+  hits: number;
+  misses: number;
+  evictions: number;
+}
+
+/**
+ * A bounded in-memory cache with least-recently-used eviction, where each
+ * entry expires after its own time to live.
+ *
+ * @param maxSize the maximum number of entries kept in memory.
+ * @param now returns the current time in milliseconds (for tests).
+ */
+export class LruCache<V> {
+  private _items: Map<string, CacheEntry<V>>;
+  private _maxSize: number;
+  private _now: () => number;
+  private _hits: number;
+  private _misses: number;
+  private _evictions: number;
+
+  constructor(maxSize: number, now: () => number = Date.now) {
+    this._items = new Map();
+    this._maxSize = maxSize;
+    this._now = now;
+    this._hits = 0;
+    this._misses = 0;
+    this._evictions = 0;
+  }
+
+  get size(): number {
+    return this._items.size;
+  }
+
+  /**
+   * Returns the cached value for the given key, or undefined if the key is
+   * not cached or its entry expired.
+   */
+  get(key: string): V | undefined {
+    const entry = this._items.get(key);
+
+    if (entry === undefined || entry.expiresAt <= this._now()) {
+      if (entry !== undefined) {
+        this._items.delete(key);
+      }
+      this._misses += 1;
+      return undefined;
+    }
+
+    // re-insert the entry, to mark it as the most recently used
+    this._items.delete(key);
+    this._items.set(key, entry);
+    this._hits += 1;
+    return entry.value;
+  }
+
+  set(key: string, value: V, ttl: number): void {
+    if (this._maxSize <= 0 || ttl <= 0) {
+      return;
+    }
+
+    this._items.delete(key);
+    this._items.set(key, {value, expiresAt: this._now() + ttl});
+
+    while (this._items.size > this._maxSize) {
+      // Maps iterate in insertion order: the first key is the least
+      // recently used one
+      const oldest = this._items.keys().next().value as string;
+      this._items.delete(oldest);
+      this._evictions += 1;
+    }
+  }
+
+  delete(key: string): void {
+    this._items.delete(key);
+  }
+
+  clear(): void {
+    this._items.clear();
+  }
+
+  get stats(): CacheStats {
+    return {
+      size: this._items.size,
+      maxSize: this._maxSize,
+      hits: this._hits,
+      misses: this._misses,
+      evictions: this._evictions,
+    };
+  }
+}
@@ -0,0 +1,45 @@
+/**
+ * Limits how many async actions run at the same time; actions beyond the
+ * limit wait for a running one to complete, in first-come first-served
+ * order.
+ *
+ * @param limit the maximum number of actions running concurrently.
+ */
+export class Semaphore {
+  private _available: number;
+  private _waiters: (() => void)[];
+
+  constructor(limit: number) {
+    this._available = Math.max(1, limit);
+    this._waiters = [];
+  }
+
+  async acquire(): Promise<void> {
+    if (this._available > 0) {
+      this._available -= 1;
+      return;
+    }
+
+    await new Promise<void>((resolve) => this._waiters.push(resolve));
+  }
+
+  release(): void {
+    const next = this._waiters.shift();
+
+    if (next) {
+      // hand over the slot directly to the next waiter
+      next();
+    } else {
+      this._available += 1;
+    }
+  }
+
+  async run<T>(action: () => Promise<T>): Promise<T> {
+    await this.acquire();
+    try {
+      return await action();
+    } finally {
+      this.release();
+    }
+  }
+}
@@ -1,3 +1,5 @@
+import {BadRequestError} from "./web";
+
 export class PageFilters {
   page: number;
   size: number;
@@ -22,3 +24,65 @@ export class PaginatedSet<T> {
     this.total = total;
   }
 }
+
+/**
+ * Filters for keyset pagination: instead of a page number, the client passes
+ * the cursor returned with the previous page, so the database seeks directly
+ * to the next items and deep pages cost the same as the first one.
+ */
+export class CursorPageFilters {
+  cursor?: string;
+  size: number;
+  search?: string;
+}
+
+/**
+ * Represents a page of items obtained with keyset pagination.
+ *
+ * @param items a subset of items from a collection.
+ * @param total the count of items in the whole collection; it can be
+ * slightly out of date, since it is cached.
+ * @param nextCursor the cursor of the next page, or null for the last page.
+ */
+export class CursorPaginatedSet<T> {
+  items: T[];
+  total: number;
+  nextCursor: string | null;
+
+  constructor(items: T[], total: number, nextCursor: string | null) {
+    this.items = items;
+    this.total = total;
+    this.nextCursor = nextCursor;
+  }
+}
+
+/**
+ * Encodes the sort key of the last item of a page into an opaque cursor,
+ * safe to be used in URLs.
+ */
+export function encodeCursor(values: string[]): string {
+  return Buffer.from(JSON.stringify(values))
+    .toString("base64")
+    .replace(/\+/g, "-")
+    .replace(/\//g, "_")
+    .replace(/=+$/, "");
+}
+
+export function decodeCursor(cursor: string, length: number): string[] {
+  let values: unknown;
+
+  try {
+    values = JSON.parse(Buffer.from(cursor, "base64").toString());
+  } catch (error) {
+    throw new BadRequestError("Invalid cursor");
+  }
+
+  if (
+    !Array.isArray(values) ||
+    values.length !== length ||
+    values.some((value) => typeof value !== "string")
+  ) {
+    throw new BadRequestError("Invalid cursor");
+  }
+  return values as string[];
+}
@@ -0,0 +1,135 @@
+import {CheckJob, CheckJobsRepository} from "../../domain/check-jobs";
+import {ClaCheckInput} from "../../domain/cla";
+import {EdgeDBRepository} from "./base";
+import {injectable} from "inversify";
+
+interface CheckJobItem {
+  id: string;
+  pull_request_id: number;
+  input: string;
+  revision: number;
+  attempts: number;
+}
+
+@injectable()
+export class EdgeDBCheckJobsRepository
+  extends EdgeDBRepository
+  implements CheckJobsRepository
+{
+  async enqueue(input: ClaCheckInput): Promise<boolean> {
+    // A newer head doesn't wait for the retry delay of the previous one.
+    // A job being processed stays leased, and complete() unlocks it for
+    // its new revision.
+    const item = await this.run(async (connection) => {
+      return await connection.queryRequiredSingle<{revision: number}>(
+        `SELECT (
+          INSERT CheckJob {
+            pull_request_id := <int64>$pull_request_id,
+            input := <str>$input
+          }
+          UNLESS CONFLICT ON .pull_request_id
+          ELSE (
+            UPDATE CheckJob SET {
+              input := <str>$input,
+              revision := .revision + 1,
+              attempts := 0,
+              retry_after := <datetime>{},
+              update_time := datetime_current()
+            }
+          )
+        ) {
+          revision
+        };`,
+        {
+          pull_request_id: input.pullRequest.id,
+          input: JSON.stringify(input),
+        }
+      );
+    });
+
+    return item.revision > 1;
+  }
+
+  async claimNext(leaseSeconds: number): Promise<CheckJob | null> {
+    // Comparisons with an empty set are empty, and so is `true OR {}`:
+    // unset locks are coalesced to true explicitly.
+    const item = await this.run(async (connection) => {
+      return await connection.querySingle<CheckJobItem>(
+        `WITH next := (
+          SELECT CheckJob
+          FILTER ((.locked_until < datetime_current()) ?? true)
+            AND ((.retry_after < datetime_current()) ?? true)
+          ORDER BY .creation_time
+          LIMIT 1
+        )
+        SELECT (
+          UPDATE next SET {
+            locked_until := datetime_current() + <duration><str>$lease,
+            attempts := .attempts + 1
+          }
+        ) {
+          pull_request_id,
+          input,
+          revision,
+          attempts
+        };`,
+        {lease: `${leaseSeconds} seconds`}
+      );
+    });
+
+    if (item) {
+      return {
+        id: item.id,
+        pullRequestId: item.pull_request_id,
+        input: JSON.parse(item.input) as ClaCheckInput,
+        revision: item.revision,
+        attempts: item.attempts,
+      };
+    }
+
+    return null;
+  }
+
+  async complete(job: CheckJob): Promise<void> {
+    await this.run(async (connection) => {
+      const deleted = await connection.query(
+        `DELETE CheckJob
+        FILTER .id = <uuid>$id AND .revision = <int64>$revision;`,
+        {id: job.id, revision: job.revision}
+      );
+
+      if (!deleted.length) {
+        await connection.query(
+          `UPDATE CheckJob
+          FILTER .id = <uuid>$id
+          SET {
+            locked_until := <datetime>{}
+          };`,
+          {id: job.id}
+        );
+      }
+    });
+  }
+
+  async retryLater(job: CheckJob, delaySeconds: number): Promise<void> {
+    await this.run(async (connection) => {
+      await connection.query(
+        `UPDATE CheckJob
+        FILTER .id = <uuid>$id
+        SET {
+          locked_until := <datetime>{},
+          retry_after := datetime_current() + <duration><str>$delay
+        };`,
+        {id: job.id, delay: `${delaySeconds} seconds`}
+      );
+    });
+  }
+
+  async countPending(): Promise<number> {
+    return await this.run(async (connection) => {
+      return await connection.queryRequiredSingle<number>(
+        `SELECT count(CheckJob);`
+      );
+    });
+  }
+}
@@ -1,6 +1,19 @@
-import {ContributorLicenseAgreement, ClaRepository} from "../../domain/cla";
+import {
+  ContributorLicenseAgreement,
+  ClaRepository,
+  MAX_CLA_LOOKUP_BATCH_SIZE,
+} from "../../domain/cla";
+import {
+  CursorPageFilters,
+  CursorPaginatedSet,
+  decodeCursor,
+  encodeCursor,
+} from "../../common/paging";
 import {EdgeDBRepository} from "./base";
 import {injectable} from "inversify";
+import {LruCache} from "../../common/cache";
+import {BadRequestError} from "../../common/web";
+import {getEnvSettingOrDefault} from "../../common/settings";
 
 interface ClaItem {
   id: string;
@@ -10,6 +23,84 @@ interface ClaItem {
   creation_time: Date;
 }
 
+interface ClaLookupItem extends ClaItem {
+  normalized_email: string;
+}
+
+interface ClaListItem extends ClaItem {
+  // creation_time as text, since JavaScript dates lose its microseconds
+  cursor_time: string;
+}
+
+const ghPseudoEmail = /^([0-9]+)\+([^@]+)@users\.noreply\.github\.com$/;
+
+/**
+ * Returns the GitHub username of a noreply pseudo email address, such as
+ * 123+octocat@users.noreply.github.com, or null for any other address.
+ */
+function getGitHubNoReplyUsername(email: string): string | null {
+  const ghEmailMatches = email.match(ghPseudoEmail);
+  return ghEmailMatches ? ghEmailMatches[2] : null;
+}
+
+// Every push to every PR looks up the CLAs of its authors, who are mostly the
+// same few frequent contributors: lookups are cached in memory.
+// Missing CLAs are cached only briefly, because authors can sign at any
+// moment, possibly through another process.
+export const claLookupCache = new LruCache<ContributorLicenseAgreement | null>(
+  parseInt(getEnvSettingOrDefault("CLA_CACHE_SIZE", "10000"), 10)
+);
+const CLA_CACHE_TTL =
+  parseInt(getEnvSettingOrDefault("CLA_CACHE_TTL", "600"), 10) * 1000;
+const CLA_CACHE_NEGATIVE_TTL =
+  parseInt(getEnvSettingOrDefault("CLA_CACHE_NEGATIVE_TTL", "30"), 10) * 1000;
+
+// Totals of the CLAs listing are cached briefly instead of counting the whole
+// table for every page; they are reset when a CLA is added.
+const claTotalsCache = new LruCache<number>(1000);
+const CLA_TOTAL_CACHE_TTL =
+  parseInt(getEnvSettingOrDefault("CLA_TOTAL_CACHE_TTL", "60"), 10) * 1000;
+
+// Escapes the wildcards of LIKE patterns, so a search text only matches
+// itself.
+function escapeLikePattern(text: string): string {
+  return text.replace(/[\\%_]/g, (character) => `\\${character}`);
+}
+
+function getCacheKey(email: string): string {
+  const ghUsername = getGitHubNoReplyUsername(email);
+  return ghUsername !== null
+    ? `username:${ghUsername}`
+    : `email:${email.toLowerCase()}`;
+}
+
+function cacheLookup(
+  email: string,
+  cla: ContributorLicenseAgreement | null
+): void {
+  claLookupCache.set(
+    getCacheKey(email),
+    cla,
+    cla ? CLA_CACHE_TTL : CLA_CACHE_NEGATIVE_TTL
+  );
+}
+
+function invalidateCachedLookups(email: string, username: string): void {
+  claLookupCache.delete(getCacheKey(email));
+  claLookupCache.delete(`email:${email.toLowerCase()}`);
+  claLookupCache.delete(`username:${username}`);
+}
+
+function mapClaItem(item: ClaItem): ContributorLicenseAgreement {
+  return new ContributorLicenseAgreement(
+    item.id,
+    item.email,
+    item.username,
+    item.versionId,
+    item.creation_time
+  );
+}
+
 @injectable()
 export class EdgeDBClaRepository
   extends EdgeDBRepository
@@ -18,10 +109,14 @@ export class EdgeDBClaRepository
   async getClaByEmailAddress(
     email: string
   ): Promise<ContributorLicenseAgreement | null> {
-    const ghPseudoEmail = /^([0-9]+)\+([^@]+)@users\.noreply\.github\.com$/;
-    const ghEmailMatches = email.match(ghPseudoEmail);
+    const cached = claLookupCache.get(getCacheKey(email));
+    if (cached !== undefined) {
+      return cached;
+    }
+
+    const ghUsername = getGitHubNoReplyUsername(email);
     let signed_cla = null;
-    if (ghEmailMatches)
+    if (ghUsername !== null)
     {
       signed_cla = await this.run(async (connection) => {
         return await connection.querySingle<ClaItem>(
@@ -34,7 +129,7 @@ export class EdgeDBClaRepository
           FILTER .username = <str>$0
           ORDER BY .email
           LIMIT 1;`,
-          [ghEmailMatches[2]]
+          [ghUsername]
         );
       });
     }
@@ -54,17 +149,201 @@ export class EdgeDBClaRepository
       });
     }
 
-    if (signed_cla) {
-      return new ContributorLicenseAgreement(
-        signed_cla.id,
-        signed_cla.email,
-        signed_cla.username,
-        signed_cla.versionId,
-        signed_cla.creation_time
+    const cla = signed_cla ? mapClaItem(signed_cla) : null;
+    cacheLookup(email, cla);
+    return cla;
+  }
+
+  async getClasByEmailAddresses(
+    emails: string[]
+  ): Promise<(ContributorLicenseAgreement | null)[]> {
+    if (emails.length > MAX_CLA_LOOKUP_BATCH_SIZE) {
+      throw new Error(
+        `Cannot look up more than ${MAX_CLA_LOOKUP_BATCH_SIZE} email ` +
+          `addresses at once, got ${emails.length}.`
       );
     }
 
-    return null;
+    const results = emails.map((email) =>
+      claLookupCache.get(getCacheKey(email))
+    );
+    const missingEmails = emails.filter(
+      (email, index) => results[index] === undefined
+    );
+
+    if (missingEmails.length) {
+      const missingClas = await this.queryClasByEmailAddresses(missingEmails);
+      let next = 0;
+
+      results.forEach((cla, index) => {
+        if (cla === undefined) {
+          results[index] = missingClas[next];
+          cacheLookup(emails[index], missingClas[next]);
+          next += 1;
+        }
+      });
+    }
+
+    return results as (ContributorLicenseAgreement | null)[];
+  }
+
+  private async queryClasByEmailAddresses(
+    emails: string[]
+  ): Promise<(ContributorLicenseAgreement | null)[]> {
+    const plainEmails: string[] = [];
+    const ghUsernames: string[] = [];
+
+    emails.forEach((email) => {
+      const ghUsername = getGitHubNoReplyUsername(email);
+      if (ghUsername !== null) {
+        ghUsernames.push(ghUsername);
+      } else {
+        plainEmails.push(email);
+      }
+    });
+
+    // Same semantics as getClaByEmailAddress, in one round trip: noreply
+    // addresses match by username, picking the first CLA by email address
+    // when a username signed with several addresses.
+    // The two lookups are united rather than ORed: .username is optional,
+    // and `.username IN usernames` is empty for CLAs without one, which
+    // would make the whole filter empty even when the email matches.
+    const items = await this.run(async (connection) => {
+      return await connection.query<ClaLookupItem>(
+        `WITH
+          emails := str_lower(array_unpack(<array<str>>$emails)),
+          usernames := array_unpack(<array<str>>$usernames),
+          clas := DISTINCT (
+            (
+              SELECT ContributorLicenseAgreement
+              FILTER .normalized_email IN emails
+            ) UNION (
+              SELECT ContributorLicenseAgreement
+              FILTER .username IN usernames
+            )
+          )
+        SELECT clas {
+          email,
+          normalized_email,
+          username,
+          creation_time,
+          versionId := .agreement_version.id
+        }
+        ORDER BY .email;`,
+        {emails: plainEmails, usernames: ghUsernames}
+      );
+    });
+
+    // prototype-less objects, since keys come from user input
+    const byEmail: {[key: string]: ClaLookupItem} = Object.create(null);
+    const byUsername: {[key: string]: ClaLookupItem} = Object.create(null);
+
+    items.forEach((item) => {
+      byEmail[item.normalized_email] = item;
+      if (item.username && !(item.username in byUsername)) {
+        byUsername[item.username] = item;
+      }
+    });
+
+    return emails.map((email) => {
+      const ghUsername = getGitHubNoReplyUsername(email);
+      const item =
+        ghUsername !== null
+          ? byUsername[ghUsername]
+          : byEmail[email.toLowerCase()];
+      return item ? mapClaItem(item) : null;
+    });
+  }
+
+  async getClas(
+    filters: CursorPageFilters
+  ): Promise<CursorPaginatedSet<ContributorLicenseAgreement>> {
+    const searchConditions: string[] = [];
+    const searchArgs: {[key: string]: string} = {};
+
+    const search = (filters.search || "").trim().toLowerCase();
+    if (search) {
+      // LIKE matches the prefix whatever the collation of the database, and
+      // the lower bound keeps the scan on the index on .normalized_email
+      searchConditions.push(
+        ".normalized_email >= <str>$search_start",
+        ".normalized_email LIKE <str>$search_pattern"
+      );
+      searchArgs.search_start = search;
+      searchArgs.search_pattern = `${escapeLikePattern(search)}%`;
+    }
+
+    const conditions = searchConditions.slice();
+    const args: {[key: string]: string | number} = {
+      ...searchArgs,
+      limit: filters.size + 1,
+    };
+
+    if (filters.cursor) {
+      // items come after the last one of the previous page, in the order
+      // given by the index on .creation_time, with ties broken by id
+      const [cursorTime, cursorId] = decodeCursor(filters.cursor, 2);
+      if (isNaN(Date.parse(cursorTime))) {
+        throw new BadRequestError("Invalid cursor");
+      }
+      conditions.push(
+        ".creation_time <= <datetime><str>$cursor_time",
+        "(.creation_time < <datetime><str>$cursor_time " +
+          "OR .id < <uuid>$cursor_id)"
+      );
+      args.cursor_time = cursorTime;
+      args.cursor_id = cursorId;
+    }
+
+    const items = await this.run(async (connection) => {
+      return await connection.query<ClaListItem>(
+        `SELECT ContributorLicenseAgreement {
+          email,
+          username,
+          creation_time,
+          cursor_time := <str>.creation_time,
+          versionId := .agreement_version.id
+        }
+        FILTER ${conditions.join(" AND ") || "true"}
+        ORDER BY .creation_time DESC THEN .id DESC
+        LIMIT <int64>$limit;`,
+        args
+      );
+    });
+
+    let nextCursor: string | null = null;
+    if (items.length > filters.size) {
+      items.pop();
+      const last = items[items.length - 1];
+      nextCursor = encodeCursor([last.cursor_time, last.id]);
+    }
+
+    const total = await this.countClas(searchConditions, searchArgs);
+    return new CursorPaginatedSet(items.map(mapClaItem), total, nextCursor);
+  }
+
+  private async countClas(
+    conditions: string[],
+    args: {[key: string]: string}
+  ): Promise<number> {
+    const cacheKey = JSON.stringify(args);
+    const cached = claTotalsCache.get(cacheKey);
+    if (cached !== undefined) {
+      return cached;
+    }
+
+    const total = await this.run(async (connection) => {
+      return await connection.queryRequiredSingle<number>(
+        `SELECT count((
+          SELECT ContributorLicenseAgreement
+          FILTER ${conditions.join(" AND ") || "true"}
+        ));`,
+        args
+      );
+    });
+
+    claTotalsCache.set(cacheKey, total, CLA_TOTAL_CACHE_TTL);
+    return total;
   }
 
   async saveCla(data: ContributorLicenseAgreement): Promise<void> {
@@ -87,5 +366,7 @@ export class EdgeDBClaRepository
       );
       data.id = result.id;
     });
+    invalidateCachedLookups(data.email, data.username);
+    claTotalsCache.clear();
   }
 }
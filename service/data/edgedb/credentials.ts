@@ -0,0 +1,78 @@
+import {CredentialsStore, StoredCredential} from "../../domain/credentials";
+import {EdgeDBRepository} from "./base";
+import {injectable} from "inversify";
+
+interface CredentialItem {
+  value: string;
+  expires_at: Date;
+}
+
+/**
+ * Keeps credentials in the database, shared by all processes of the
+ * application and preserved across restarts.
+ */
+@injectable()
+export class EdgeDBCredentialsStore
+  extends EdgeDBRepository
+  implements CredentialsStore
+{
+  async get(key: string): Promise<StoredCredential | null> {
+    const item = await this.run(async (connection) => {
+      return await connection.querySingle<CredentialItem>(
+        `SELECT Credential {
+          value,
+          expires_at
+        }
+        FILTER .name = <str>$name
+          AND .expires_at > datetime_current();`,
+        {
+          name: key,
+        }
+      );
+    });
+
+    if (item === null) {
+      return null;
+    }
+
+    return {
+      value: item.value,
+      expiresAt: item.expires_at.getTime(),
+    };
+  }
+
+  async set(key: string, credential: StoredCredential): Promise<void> {
+    await this.run(async (connection) => {
+      await connection.query(
+        `DELETE Credential FILTER .expires_at < datetime_current();`
+      );
+      await connection.query(
+        `INSERT Credential {
+          name := <str>$name,
+          value := <str>$value,
+          expires_at := <datetime>$expires_at
+        }
+        UNLESS CONFLICT ON .name
+        ELSE (
+          UPDATE Credential SET {
+            value := <str>$value,
+            expires_at := <datetime>$expires_at
+          }
+        );`,
+        {
+          name: key,
+          value: credential.value,
+          expires_at: new Date(credential.expiresAt),
+        }
+      );
+    });
+  }
+
+  async delete(key: string): Promise<void> {
+    await this.run(async (connection) => {
+      await connection.query(`DELETE Credential FILTER .name = <str>$name;`, {
+        name: key,
+      });
+    });
+  }
+}
@@ -10,6 +10,8 @@ import {RepositoriesRepository} from "../../domain/repositories";
 import {EdgeDBRepositoriesRepository} from "./repositories";
 import {EdgeDBAdministratorsRepository} from "./administrators";
 import {AdministratorsRepository} from "../../domain/administrators";
+import {CheckJobsRepository} from "../../domain/check-jobs";
+import {EdgeDBCheckJobsRepository} from "./check-jobs";
 
 export function registerEdgeDBRepositories(container: Container): void {
   container
@@ -36,4 +38,9 @@ export function registerEdgeDBRepositories(container: Container): void {
     .bind<RepositoriesRepository>(TYPES.RepositoriesRepository)
     .to(EdgeDBRepositoriesRepository)
     .inSingletonScope();
+
+  container
+    .bind<CheckJobsRepository>(TYPES.CheckJobsRepository)
+    .to(EdgeDBCheckJobsRepository)
+    .inSingletonScope();
 }
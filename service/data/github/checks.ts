@@ -8,8 +8,10 @@ import {
 } from "../../domain/checks";
 import {expectSuccessfulResponse} from "../../common/web";
 import {getHeadersForJsonContent} from "./headers";
-import {hasMoreItems} from "./utils";
+import {GITHUB_API_URL, getLastPageNumber, hasMoreItems} from "./utils";
 import {injectable} from "inversify";
+import {Semaphore} from "../../common/concurrency";
+import {getEnvSettingOrDefault} from "../../common/settings";
 
 interface GitHubPersonInfo {
   name: string;
@@ -38,48 +40,137 @@ interface GitHubCommitItem {
   committer: GitHubLoginInfo;
 }
 
+interface CommitsPage {
+  items: GitHubCommitItem[];
+  hasMore: boolean;
+  lastPageNumber: number | null;
+}
+
+// GitHub lists at most 250 commits for a pull request, and returns at most
+// 100 items per page.
+const MAX_PULL_REQUEST_COMMITS = 250;
+const COMMITS_PAGE_SIZE = 100;
+
+// Maximum number of concurrent requests to GitHub for each installation of
+// the app, i.e. for each account owning repositories.
+const FETCH_CONCURRENCY = parseInt(
+  getEnvSettingOrDefault("GITHUB_FETCH_CONCURRENCY", "4"),
+  10
+);
+
 @injectable()
 export class GitHubStatusChecksAPI implements StatusChecksService {
   private _access_token_handler: GitHubAccessHandler;
+  private _limiters: {[owner: string]: Semaphore};
 
   public constructor() {
     this._access_token_handler = accessHandler;
+    this._limiters = {};
+  }
+
+  private getLimiter(targetRepoFullName: string): Semaphore {
+    const owner = targetRepoFullName.split("/")[0];
+
+    if (!(owner in this._limiters)) {
+      this._limiters[owner] = new Semaphore(FETCH_CONCURRENCY);
+    }
+    return this._limiters[owner];
+  }
+
+  private async getCommitsPage(
+    targetRepoFullName: string,
+    pullRequestNumber: number,
+    pageNumber: number
+  ): Promise<CommitsPage> {
+    const response = await fetch(
+      `${GITHUB_API_URL}/repos/${targetRepoFullName}/pulls/${pullRequestNumber}/commits?per_page=${COMMITS_PAGE_SIZE}&page=${pageNumber}`
+    );
+
+    await expectSuccessfulResponse(response);
+
+    const items: GitHubCommitItem[] = await response.json();
+    return {
+      items,
+      hasMore: items.length > 0 && hasMoreItems(response),
+      lastPageNumber: getLastPageNumber(response),
+    };
   }
 
   @async_retry()
   async getAllAuthorsByPullRequestId(
     targetRepoFullName: string,
     pullRequestNumber: number,
-    preApprovedAccounts: string[]
+    preApprovedAccounts: string[],
+    onNewAuthors?: (emails: string[]) => void
   ): Promise<string[]> {
-    let pageNumber = 0;
+    const limiter = this.getLimiter(targetRepoFullName);
     const authorsEmails = new Set<string>();
 
-    // GitHub returns commits in pages of 30 items;
-    // we have two ways to know when we should stop fetching commits:
-    // either do a call to get PR infor and see how many "commits" were done
-    // or make web requests increasing the page until the
-    while (true) {
-      const response = await fetch(
-        `https://api.github.com/repos/${targetRepoFullName}/pulls/${pullRequestNumber}/commits?page=${pageNumber}`
-      );
-
-      await expectSuccessfulResponse(response);
+    const collectAuthors = (page: CommitsPage): CommitsPage => {
+      const newEmails: string[] = [];
 
-      const data: GitHubCommitItem[] = await response.json();
+      page.items.forEach((item) => {
+        if (item.author && preApprovedAccounts.includes(item.author.login)) {
+          return;
+        }
 
-      data.forEach((item) => {
-        if (!(item.author && preApprovedAccounts.includes(item.author.login)))
-        {
-          authorsEmails.add(item.commit.author.email);
+        const email = item.commit.author.email;
+        if (!authorsEmails.has(email)) {
+          authorsEmails.add(email);
+          newEmails.push(email);
         }
       });
 
-      if (!data.length || !hasMoreItems(response)) {
-        break;
+      if (newEmails.length && onNewAuthors) {
+        onNewAuthors(newEmails);
       }
+      return page;
+    };
+
+    // The "last" link of the first page tells how many pages remain, so
+    // that they can be fetched concurrently instead of following "next"
+    // links one by one. Most PRs fit in the first page.
+    const firstPage = collectAuthors(
+      await limiter.run(() =>
+        this.getCommitsPage(targetRepoFullName, pullRequestNumber, 1)
+      )
+    );
+    const pagesCount = Math.min(
+      firstPage.lastPageNumber || 1,
+      Math.ceil(MAX_PULL_REQUEST_COMMITS / COMMITS_PAGE_SIZE)
+    );
+
+    const pages: Promise<CommitsPage>[] = [Promise.resolve(firstPage)];
+    for (let pageNumber = 2; pageNumber <= pagesCount; pageNumber++) {
+      pages.push(
+        limiter
+          .run(() =>
+            this.getCommitsPage(
+              targetRepoFullName,
+              pullRequestNumber,
+              pageNumber
+            )
+          )
+          .then(collectAuthors)
+      );
+    }
 
-      pageNumber += 1;
+    let lastPage = (await Promise.all(pages))[pagesCount - 1];
+    let nextPageNumber = pagesCount + 1;
+
+    // Commits might have been pushed after the first page was read: in
+    // that case, follow the remaining pages one by one.
+    while (lastPage.hasMore) {
+      lastPage = collectAuthors(
+        await limiter.run(() =>
+          this.getCommitsPage(
+            targetRepoFullName,
+            pullRequestNumber,
+            nextPageNumber
+          )
+        )
+      );
+      nextPageNumber += 1;
     }
 
     return Array.from(authorsEmails);
@@ -98,7 +189,7 @@ export class GitHubStatusChecksAPI implements StatusChecksService {
       );
 
     const response = await fetch(
-      `https://api.github.com/repos/${targetRepoFullName}/statuses/${pullRequestHeadSha}`,
+      `${GITHUB_API_URL}/repos/${targetRepoFullName}/statuses/${pullRequestHeadSha}`,
       {
         method: "POST",
         body: JSON.stringify({
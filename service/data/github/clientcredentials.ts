@@ -1,9 +1,17 @@
 import fetch from "cross-fetch";
 import fs from "fs";
 import jwt from "jsonwebtoken";
+import {CredentialsStore, StoredCredential} from "../../domain/credentials";
+import {EdgeDBCredentialsStore} from "../edgedb/credentials";
+import {FileCredentialsStore, MemoryCredentialsStore} from "./credentials";
+import {
+  getEnvSettingOrDefault,
+  getEnvSettingOrThrow,
+} from "../../common/settings";
 import {async_retry} from "../../common/resiliency";
 import {getHeaders} from "./headers";
 import {expectSuccessfulResponse} from "../../common/web";
+import {GITHUB_API_URL} from "./utils";
 
 export class InstallationNotFoundError extends Error {
   constructor(targetAccountId: number) {
@@ -43,6 +51,47 @@ interface AccessToken {
   expiresAt: number;
 }
 
+// Installation access tokens last one hour: a new one is requested when less
+// than this time is left, while the current one keeps being used.
+const REFRESH_AHEAD_MS = 5 * 60 * 1000;
+// Access tokens this close to their expiration are not used anymore.
+const EXPIRATION_MARGIN_MS = 60 * 1000;
+// Installation ids change only if the application is installed again.
+const INSTALLATION_ID_TTL_MS = 24 * 60 * 60 * 1000;
+
+function accessTokenKey(targetAccountId: number): string {
+  return `github:access-token:${targetAccountId}`;
+}
+
+function installationIdKey(targetAccountId: number): string {
+  return `github:installation-id:${targetAccountId}`;
+}
+
+export function createCredentialsStore(): CredentialsStore {
+  const storeType = getEnvSettingOrDefault(
+    "GITHUB_CREDENTIALS_STORE",
+    "edgedb"
+  );
+
+  switch (storeType) {
+    case "edgedb":
+      return new EdgeDBCredentialsStore();
+    case "file":
+      // no default location: a predictable path in a shared directory could
+      // be created beforehand by another user of the machine
+      return new FileCredentialsStore(
+        getEnvSettingOrThrow("GITHUB_CREDENTIALS_FILE")
+      );
+    case "memory":
+      return new MemoryCredentialsStore();
+  }
+
+  throw new Error(
+    `Invalid GITHUB_CREDENTIALS_STORE environmental variable: ${storeType}; ` +
+      "it must be one of: edgedb, file, memory."
+  );
+}
+
 export class GitHubAccessHandler {
   // This class handles client credentials flow to obtain access tokens
   // to interact with our own organization
@@ -50,11 +99,17 @@ export class GitHubAccessHandler {
   private _privateKey: Buffer;
   private _githubApplicationId: number;
   private _accountAccessTokensCache: {[accountId: number]: AccessToken};
+  private _installationIdsCache: {[accountId: number]: number};
+  private _pendingRefreshes: {[accountId: number]: Promise<AccessToken>};
+  private _store: CredentialsStore;
 
-  constructor() {
+  constructor(store?: CredentialsStore) {
     this._privateKey = this.getPrivateKey();
     this._githubApplicationId = this.getGitHubApplicationId();
     this._accountAccessTokensCache = {};
+    this._installationIdsCache = {};
+    this._pendingRefreshes = {};
+    this._store = store || new MemoryCredentialsStore();
   }
 
   private getPrivateKeyPath(): string {
@@ -120,8 +175,9 @@ export class GitHubAccessHandler {
         targetAccountId
       ];
 
-      // applies a margin of 60 seconds while checking for expiration
-      if (new Date().getTime() + 60000 < cachedAccessToken.expiresAt) {
+      // applies a margin while checking for expiration
+      const now = new Date().getTime();
+      if (now + EXPIRATION_MARGIN_MS < cachedAccessToken.expiresAt) {
         // reusing a cached access token
         return cachedAccessToken;
       }
@@ -136,7 +192,7 @@ export class GitHubAccessHandler {
     targetAccountId: number,
     primaryAccessToken: string
   ): Promise<number> {
-    const response = await fetch("https://api.github.com/app/installations", {
+    const response = await fetch(`${GITHUB_API_URL}/app/installations`, {
       method: "GET",
       headers: getHeaders(primaryAccessToken),
     });
@@ -169,7 +225,7 @@ export class GitHubAccessHandler {
     if (!primaryAccessToken)
       primaryAccessToken = this.createPrimaryAccessToken();
 
-    const response = await fetch("https://api.github.com/app", {
+    const response = await fetch(`${GITHUB_API_URL}/app`, {
       method: "GET",
       headers: getHeaders(primaryAccessToken),
     });
@@ -211,32 +267,187 @@ export class GitHubAccessHandler {
     // would enable to follow "look before you leap"
 
     // installation access tokens issued by GitHub last one hour, so we
-    // cache them in memory and reuse them if possible
-    const cachedAccessToken = this.getCachedAccessToken(targetAccountId);
+    // cache them and reuse them if possible: in memory, and in a store
+    // shared with the other processes of the application
+    let accessToken = this.getCachedAccessToken(targetAccountId);
+
+    if (accessToken === null) {
+      accessToken = await this.getStoredAccessToken(targetAccountId);
+    }
+
+    if (accessToken === null) {
+      accessToken = await this.refreshAccessToken(
+        targetAccountId,
+        primaryAccessToken
+      );
+    } else if (
+      accessToken.expiresAt - new Date().getTime() < REFRESH_AHEAD_MS
+    ) {
+      // renews the access token ahead of its expiration, without making
+      // the caller wait for it
+      this.refreshAccessToken(targetAccountId).catch((error) => {
+        // tslint:disable-next-line: no-console
+        console.error(
+          `Failed to refresh the access token for account ` +
+            `${targetAccountId}: ${error}`
+        );
+      });
+    }
 
-    if (cachedAccessToken !== null) {
-      return cachedAccessToken.value;
+    return accessToken.value;
+  }
+
+  private refreshAccessToken(
+    targetAccountId: number,
+    primaryAccessToken?: string
+  ): Promise<AccessToken> {
+    // concurrent requests for the same account share a single refresh
+    let refresh = this._pendingRefreshes[targetAccountId];
+
+    if (refresh === undefined) {
+      refresh = this.obtainAccessToken(targetAccountId, primaryAccessToken);
+      this._pendingRefreshes[targetAccountId] = refresh;
+
+      const forget = () => {
+        delete this._pendingRefreshes[targetAccountId];
+      };
+      refresh.then(forget, forget);
+    }
+    return refresh;
+  }
+
+  private async obtainAccessToken(
+    targetAccountId: number,
+    primaryAccessToken?: string
+  ): Promise<AccessToken> {
+    // another process may have refreshed the access token in the meantime
+    const storedAccessToken = await this.getStoredAccessToken(
+      targetAccountId
+    );
+
+    if (
+      storedAccessToken !== null &&
+      storedAccessToken.expiresAt - new Date().getTime() >= REFRESH_AHEAD_MS
+    ) {
+      return storedAccessToken;
     }
 
     if (!primaryAccessToken)
       primaryAccessToken = this.createPrimaryAccessToken();
 
-    const installationId = await this.getInstallationIdByAccountId(
+    const installationId = await this.getInstallationId(
       targetAccountId,
       primaryAccessToken
     );
 
-    // tslint:disable-next-line: max-line-length
-    const installationAccessTokenResult = await this.getAccessTokenForInstallation(
-      installationId
-    );
+    let installationAccessTokenResult: GitHubInstallationAccessTokenResult;
+
+    try {
+      installationAccessTokenResult = await this.getAccessTokenForInstallation(
+        installationId,
+        primaryAccessToken
+      );
+    } catch (error) {
+      // the application might have been installed again, with a new id
+      delete this._installationIdsCache[targetAccountId];
+      await this.deleteStoredCredential(installationIdKey(targetAccountId));
+      throw error;
+    }
 
-    this.setCachedAccessToken(targetAccountId, {
+    const accessToken = {
       value: installationAccessTokenResult.token,
       expiresAt: new Date(installationAccessTokenResult.expires_at).getTime(),
-    });
+    };
+
+    this.setCachedAccessToken(targetAccountId, accessToken);
+    await this.setStoredCredential(
+      accessTokenKey(targetAccountId),
+      accessToken
+    );
+    return accessToken;
+  }
+
+  private async getStoredAccessToken(
+    targetAccountId: number
+  ): Promise<AccessToken | null> {
+    const accessToken = await this.getStoredCredential(
+      accessTokenKey(targetAccountId)
+    );
+
+    if (
+      accessToken === null ||
+      new Date().getTime() + EXPIRATION_MARGIN_MS >= accessToken.expiresAt
+    ) {
+      return null;
+    }
+
+    this.setCachedAccessToken(targetAccountId, accessToken);
+    return accessToken;
+  }
+
+  private async getInstallationId(
+    targetAccountId: number,
+    primaryAccessToken: string
+  ): Promise<number> {
+    if (targetAccountId in this._installationIdsCache) {
+      return this._installationIdsCache[targetAccountId];
+    }
 
-    return installationAccessTokenResult.token;
+    const key = installationIdKey(targetAccountId);
+    const storedInstallationId = await this.getStoredCredential(key);
+    let installationId: number;
+
+    if (storedInstallationId !== null) {
+      installationId = parseInt(storedInstallationId.value, 10);
+    } else {
+      installationId = await this.getInstallationIdByAccountId(
+        targetAccountId,
+        primaryAccessToken
+      );
+      await this.setStoredCredential(key, {
+        value: `${installationId}`,
+        expiresAt: new Date().getTime() + INSTALLATION_ID_TTL_MS,
+      });
+    }
+
+    this._installationIdsCache[targetAccountId] = installationId;
+    return installationId;
+  }
+
+  // The store is only an optimization: when it's not available, access
+  // tokens are obtained from GitHub and cached in memory.
+
+  private async getStoredCredential(
+    key: string
+  ): Promise<StoredCredential | null> {
+    try {
+      return await this._store.get(key);
+    } catch (error) {
+      // tslint:disable-next-line: no-console
+      console.error(`Failed to read ${key} from the store: ${error}`);
+      return null;
+    }
+  }
+
+  private async setStoredCredential(
+    key: string,
+    credential: StoredCredential
+  ): Promise<void> {
+    try {
+      await this._store.set(key, credential);
+    } catch (error) {
+      // tslint:disable-next-line: no-console
+      console.error(`Failed to write ${key} to the store: ${error}`);
+    }
+  }
+
+  private async deleteStoredCredential(key: string): Promise<void> {
+    try {
+      await this._store.delete(key);
+    } catch (error) {
+      // tslint:disable-next-line: no-console
+      console.error(`Failed to delete ${key} from the store: ${error}`);
+    }
   }
 
   @async_retry()
@@ -254,7 +465,7 @@ export class GitHubAccessHandler {
       primaryAccessToken = this.createPrimaryAccessToken();
 
     const response = await fetch(
-      `https://api.github.com/app/installations/${installationId}/access_tokens`,
+      `${GITHUB_API_URL}/app/installations/${installationId}/access_tokens`,
       {
         method: "POST",
         headers: getHeaders(primaryAccessToken),
@@ -268,6 +479,6 @@ export class GitHubAccessHandler {
   }
 }
 
-const accessHandler = new GitHubAccessHandler();
+const accessHandler = new GitHubAccessHandler(createCredentialsStore());
 
 export {accessHandler};
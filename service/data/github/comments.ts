@@ -4,6 +4,7 @@ import {CommentsService} from "../../domain/comments";
 import {expectSuccessfulResponse} from "../../common/web";
 import {accessHandler, GitHubAccessHandler} from "./clientcredentials";
 import {getHeadersForJsonContent} from "./headers";
+import {GITHUB_API_URL} from "./utils";
 import {injectable} from "inversify";
 
 interface CratedCommentOutput {
@@ -29,7 +30,7 @@ export class GitHubCommentsService implements CommentsService {
       .getAccessTokenForAccount(targetAccountId);
 
     const response = await fetch(
-      `https://api.github.com/repos/${targetRepoFullName}/issues/${issueId}/comments`,
+      `${GITHUB_API_URL}/repos/${targetRepoFullName}/issues/${issueId}/comments`,
       {
         method: "POST",
         body: JSON.stringify({body}),
@@ -54,7 +55,7 @@ export class GitHubCommentsService implements CommentsService {
       .getAccessTokenForAccount(targetAccountId);
 
     const response = await fetch(
-      `https://api.github.com/repos/${targetRepoFullName}/issues/comments/${commentId}`,
+      `${GITHUB_API_URL}/repos/${targetRepoFullName}/issues/comments/${commentId}`,
       {
         method: "PATCH",
         body: JSON.stringify({body}),
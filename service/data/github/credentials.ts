@@ -0,0 +1,166 @@
+import fs from "fs";
+import path from "path";
+import {CredentialsStore, StoredCredential} from "../../domain/credentials";
+
+interface StoredCredentials {
+  [key: string]: StoredCredential;
+}
+
+let temporaryFilesCount = 0;
+
+// Updates of each file are read-modify-write cycles: they are serialized
+// within this process, so concurrent changes don't lose each other's keys.
+const pendingUpdates: {[filePath: string]: Promise<void>} =
+  Object.create(null);
+
+function isExpired(credential: StoredCredential): boolean {
+  return credential.expiresAt <= new Date().getTime();
+}
+
+/**
+ * Keeps credentials in the memory of the current process only.
+ */
+export class MemoryCredentialsStore implements CredentialsStore {
+  private _items: StoredCredentials = Object.create(null);
+
+  async get(key: string): Promise<StoredCredential | null> {
+    const credential = this._items[key];
+
+    if (credential === undefined || isExpired(credential)) {
+      delete this._items[key];
+      return null;
+    }
+    return credential;
+  }
+
+  async set(key: string, credential: StoredCredential): Promise<void> {
+    this._items[key] = credential;
+  }
+
+  async delete(key: string): Promise<void> {
+    delete this._items[key];
+  }
+}
+
+/**
+ * Keeps credentials in a JSON file, shared by all processes running on the
+ * same machine. The file is readable only by its owner, and it is replaced
+ * atomically on each change, so readers never see a partial write. A file
+ * owned by another user is refused: put it in a directory that only the
+ * user of the application can write to.
+ * Concurrent changes from other processes can still overwrite each other:
+ * the last one wins, and a lost credential is simply obtained again.
+ */
+export class FileCredentialsStore implements CredentialsStore {
+  private _filePath: string;
+
+  constructor(filePath: string) {
+    this._filePath = filePath;
+  }
+
+  async get(key: string): Promise<StoredCredential | null> {
+    const credential = (await this.read())[key];
+
+    if (credential === undefined || isExpired(credential)) {
+      return null;
+    }
+    return credential;
+  }
+
+  async set(key: string, credential: StoredCredential): Promise<void> {
+    await this.update((items) => {
+      items[key] = credential;
+      return true;
+    });
+  }
+
+  async delete(key: string): Promise<void> {
+    await this.update((items) => {
+      if (key in items) {
+        delete items[key];
+        return true;
+      }
+      return false;
+    });
+  }
+
+  /**
+   * Applies a change to the stored credentials, after the changes already
+   * pending for the same file; the file is written if `change` returns true.
+   */
+  private update(
+    change: (items: StoredCredentials) => boolean
+  ): Promise<void> {
+    const previous = pendingUpdates[this._filePath] || Promise.resolve();
+    const next = previous
+      .catch(() => undefined)
+      .then(async () => {
+        const items = await this.read();
+        if (change(items)) {
+          await this.write(items);
+        }
+      });
+
+    pendingUpdates[this._filePath] = next;
+    return next;
+  }
+
+  private async read(): Promise<StoredCredentials> {
+    const items: StoredCredentials = Object.create(null);
+    let file: fs.promises.FileHandle;
+
+    try {
+      file = await fs.promises.open(this._filePath, "r");
+    } catch (error) {
+      if ((error as NodeJS.ErrnoException).code === "ENOENT") {
+        return items;
+      }
+      throw error;
+    }
+
+    let content: string;
+
+    try {
+      const stats = await file.stat();
+
+      if (process.getuid && stats.uid !== process.getuid()) {
+        throw new Error(
+          `Refusing credentials file ${this._filePath}, ` +
+            `owned by another user (uid ${stats.uid})`
+        );
+      }
+      content = await file.readFile("utf8");
+    } finally {
+      await file.close();
+    }
+
+    try {
+      return Object.assign(items, JSON.parse(content));
+    } catch (error) {
+      // a corrupted cache is as good as an empty one
+      // tslint:disable-next-line: no-console
+      console.warn(`Ignoring invalid credentials file ${this._filePath}`);
+      return items;
+    }
+  }
+
+  private async write(items: StoredCredentials): Promise<void> {
+    for (const key of Object.keys(items)) {
+      if (isExpired(items[key])) {
+        delete items[key];
+      }
+    }
+
+    temporaryFilesCount += 1;
+    const temporaryPath = path.join(
+      path.dirname(this._filePath),
+      `.${path.basename(this._filePath)}.` +
+        `${process.pid}.${temporaryFilesCount}.tmp`
+    );
+
+    await fs.promises.writeFile(temporaryPath, JSON.stringify(items), {
+      mode: 0o600,
+    });
+    await fs.promises.rename(temporaryPath, this._filePath);
+  }
+}
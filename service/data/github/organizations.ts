@@ -2,7 +2,7 @@ import {
   OrganizationMember,
   OrganizationsService,
 } from "../../../service/domain/organizations";
-import {fetchAllItems} from "./utils";
+import {fetchAllItems, GITHUB_API_URL} from "./utils";
 import {injectable} from "inversify";
 import {accessHandler, GitHubAccessHandler} from "./clientcredentials";
 import {getHeadersForJsonContent} from "./headers";
@@ -29,7 +29,7 @@ export class GitHubOrganizationsService implements OrganizationsService {
     const token = await this._access_token_handler.getOrgAccessToken();
 
     const items = await fetchAllItems<GitHubMemberInfo>(
-      `https://api.github.com/orgs/${organization}/members?role=${role}`,
+      `${GITHUB_API_URL}/orgs/${organization}/members?role=${role}`,
       {
         headers: getHeadersForJsonContent(token),
       }
@@ -3,7 +3,7 @@ import {
   ExternalRepository,
   RepositoriesService,
 } from "../../../service/domain/repositories";
-import {fetchAllItems} from "./utils";
+import {fetchAllItems, GITHUB_API_URL} from "./utils";
 import {injectable} from "inversify";
 
 interface GitHubRepositoryInfo {
@@ -19,7 +19,7 @@ export class GitHubRepositoriesService implements RepositoriesService {
   @async_retry()
   async getRepositories(organization: string): Promise<ExternalRepository[]> {
     const items = await fetchAllItems<GitHubRepositoryInfo>(
-      `https://api.github.com/orgs/${organization}/repos`
+      `${GITHUB_API_URL}/orgs/${organization}/repos`
     );
 
     return items
@@ -2,14 +2,14 @@ import fetch from "cross-fetch";
 import {async_retry} from "../../common/resiliency";
 import {EmailInfo, UserInfo, UsersService} from "../../domain/users";
 import {expectSuccessfulResponse} from "../../common/web";
-import {fetchAllItems} from "./utils";
+import {fetchAllItems, GITHUB_API_URL} from "./utils";
 import {injectable} from "inversify";
 
 @injectable()
 export class GitHubUsersService implements UsersService {
   @async_retry()
   async getUserInfoFromAccessToken(accessToken: string): Promise<UserInfo> {
-    const response = await fetch("https://api.github.com/user", {
+    const response = await fetch(`${GITHUB_API_URL}/user`, {
       method: "GET",
       headers: {
         Authorization: `token ${accessToken}`,
@@ -21,7 +21,7 @@ export class GitHubUsersService implements UsersService {
   }
 
   async getUserEmailAddresses(accessToken: string): Promise<EmailInfo[]> {
-    return await fetchAllItems("https://api.github.com/user/emails", {
+    return await fetchAllItems(`${GITHUB_API_URL}/user/emails`, {
       method: "GET",
       headers: {
         Authorization: `token ${accessToken}`,
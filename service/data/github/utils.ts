@@ -1,5 +1,13 @@
 import fetch from "cross-fetch";
 import {expectSuccessfulResponse} from "../../common/web";
+import {getEnvSettingOrDefault} from "../../common/settings";
+
+// Base URL of the GitHub REST API; it can be overridden to point the service
+// at a local stand-in, for example when running benchmarks.
+export const GITHUB_API_URL = getEnvSettingOrDefault(
+  "GITHUB_API_URL",
+  "https://api.github.com"
+).replace(/\/+$/, "");
 
 export function hasMoreItems(response: Response): boolean {
   // https://developer.github.com/v3/guides/traversing-with-pagination/
@@ -14,6 +22,15 @@ export function hasMoreItems(response: Response): boolean {
   return true;
 }
 
+export function getLastPageNumber(response: Response): number | null {
+  // the "last" link is present on every page but the last one
+  const link = response.headers.get("link");
+  const lastLink = link && link.match(/<([^>]*)>;\s*rel="last"/);
+  const page = lastLink && lastLink[1].match(/[?&]page=(\d+)/);
+
+  return page ? parseInt(page[1], 10) : null;
+}
+
 export async function fetchAllItems<T>(
   url: string,
   init?: RequestInit
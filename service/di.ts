@@ -13,6 +13,7 @@ import {registerGitHubServices} from "./data/github/di";
 import {RepositoriesHandler} from "./handlers/repositories";
 import {AdministratorsHandler} from "./handlers/administrators";
 import {ClasHandler} from "./handlers/clas";
+import {ClaCheckQueue} from "./handlers/check-queue";
 
 const container = new Container();
 
@@ -28,6 +29,11 @@ container.bind<SignClaHandler>(TYPES.SignClaHandler).to(SignClaHandler);
 
 container.bind<ClaCheckHandler>(TYPES.ClaCheckHandler).to(ClaCheckHandler);
 
+container
+  .bind<ClaCheckQueue>(TYPES.ClaCheckQueue)
+  .to(ClaCheckQueue)
+  .inSingletonScope();
+
 container
   .bind<AgreementsHandler>(TYPES.AgreementsHandler)
   .to(AgreementsHandler);
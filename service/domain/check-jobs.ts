@@ -0,0 +1,43 @@
+import {ClaCheckInput} from "./cla";
+
+/**
+ * A pending CLA check for a pull request. Webhook events received for the
+ * same pull request while a job is pending replace its input with the
+ * latest one and increase its revision.
+ */
+export interface CheckJob {
+  id: string;
+  pullRequestId: number;
+  input: ClaCheckInput;
+  revision: number;
+  attempts: number;
+}
+
+export interface CheckJobsRepository {
+  /**
+   * Stores a job for the pull request of the given input, or replaces the
+   * input of the job already pending for the same pull request.
+   * Returns true in the second case, when the event was coalesced.
+   */
+  enqueue(input: ClaCheckInput): Promise<boolean>;
+
+  /**
+   * Locks the oldest job that isn't locked by someone else, for the given
+   * number of seconds; returns null if there are no such jobs.
+   */
+  claimNext(leaseSeconds: number): Promise<CheckJob | null>;
+
+  /**
+   * Deletes a processed job, unless it was updated by a newer event in the
+   * meantime: in such case it is unlocked, to be processed again.
+   */
+  complete(job: CheckJob): Promise<void>;
+
+  /**
+   * Unlocks a failed job, to be claimed again after the given number of
+   * seconds; a newer event for the same pull request cancels this delay.
+   */
+  retryLater(job: CheckJob, delaySeconds: number): Promise<void>;
+
+  countPending(): Promise<number>;
+}
@@ -23,10 +23,17 @@ export class StatusCheckInput {
 }
 
 export interface StatusChecksService {
+  /**
+   * Returns the unique email addresses of the commit authors of a PR.
+   * If given, onNewAuthors is called as soon as new authors are known, while
+   * the remaining commits are still being fetched. When fetching is retried,
+   * it can be called again with emails it already received.
+   */
   getAllAuthorsByPullRequestId(
     targetRepoFullName: string,
     pullRequestNumber: number,
-    preApprovedAccounts: string[]
+    preApprovedAccounts: string[],
+    onNewAuthors?: (emails: string[]) => void
   ): Promise<string[]>;
 
   createStatus(
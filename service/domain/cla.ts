@@ -1,3 +1,5 @@
+import {CursorPageFilters, CursorPaginatedSet} from "../common/paging";
+
 export interface ClaCheckRepository {
   id: number;
   owner: string;
@@ -68,10 +70,36 @@ export interface ClasImportOutput {
   results: ClasImportEntryResult[];
 }
 
+// Upper bound for the number of email addresses resolved by a single
+// ClaRepository.getClasByEmailAddresses call.
+export const MAX_CLA_LOOKUP_BATCH_SIZE = 100;
+
+// Upper bound for the number of CLAs returned by a single
+// ClaRepository.getClas call.
+export const MAX_CLA_PAGE_SIZE = 100;
+
 export interface ClaRepository {
   getClaByEmailAddress(
     email: string
   ): Promise<ContributorLicenseAgreement | null>;
 
+  /**
+   * Resolves the CLAs of several email addresses with a single query.
+   * Results are in the same order as the given email addresses, with null
+   * for those that didn't sign the CLA. Accepts up to
+   * MAX_CLA_LOOKUP_BATCH_SIZE email addresses.
+   */
+  getClasByEmailAddresses(
+    emails: string[]
+  ): Promise<(ContributorLicenseAgreement | null)[]>;
+
+  /**
+   * Returns a page of CLAs, most recently signed first. When a search text
+   * is given, only CLAs whose email address starts with it are returned.
+   */
+  getClas(
+    filters: CursorPageFilters
+  ): Promise<CursorPaginatedSet<ContributorLicenseAgreement>>;
+
   saveCla(data: ContributorLicenseAgreement): Promise<void>;
 }
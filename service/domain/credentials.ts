@@ -0,0 +1,25 @@
+/**
+ * A value cached until a point in time, expressed in milliseconds since the
+ * epoch.
+ */
+export interface StoredCredential {
+  value: string;
+  expiresAt: number;
+}
+
+/**
+ * Stores credentials obtained from external services (e.g. GitHub
+ * installation access tokens) so they can be reused by all processes of
+ * the application, and across restarts.
+ */
+export interface CredentialsStore {
+  /**
+   * Returns the credential stored under the given key, or null if it's
+   * missing or expired.
+   */
+  get(key: string): Promise<StoredCredential | null>;
+
+  set(key: string, credential: StoredCredential): Promise<void>;
+
+  delete(key: string): Promise<void>;
+}
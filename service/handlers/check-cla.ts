@@ -4,7 +4,11 @@ import {
   StatusCheckInput,
   StatusChecksService,
 } from "../../service/domain/checks";
-import {ClaCheckInput, ClaRepository} from "../../service/domain/cla";
+import {
+  ClaCheckInput,
+  ClaRepository,
+  MAX_CLA_LOOKUP_BATCH_SIZE,
+} from "../../service/domain/cla";
 import {
   CommentsRepository,
   CommentsService,
@@ -113,20 +117,19 @@ class ClaCheckHandler {
   }
 
   async allAuthorsHaveSignedTheCla(allAuthors: string[]): Promise<boolean> {
-    // This code performs fine in realistic scenarios: most PRs will
-    // have a single author email, or only a few.
+    // Most PRs have a single author email, or only a few, and are resolved
+    // with a single query.
     // However, someone might trick our service by faking a big number of
     // unique users and a big number of commits.
-    // In such unhappy case, it makes sense to handle
-    // committers sequentially one by one, to not starve our resources for a
-    // single request.
-
-    for (let i = 0; i < allAuthors.length; i++) {
-      const email = allAuthors[i];
+    // In such unhappy case, committers are handled sequentially in batches
+    // of bounded size, to not starve our resources for a single request.
 
-      const cla = await this._claRepository.getClaByEmailAddress(email);
+    for (let i = 0; i < allAuthors.length; i += MAX_CLA_LOOKUP_BATCH_SIZE) {
+      const clas = await this._claRepository.getClasByEmailAddresses(
+        allAuthors.slice(i, i + MAX_CLA_LOOKUP_BATCH_SIZE)
+      );
 
-      if (cla == null) {
+      if (clas.some((cla) => cla == null)) {
         return false;
       }
     }
@@ -158,11 +161,34 @@ class ClaCheckHandler {
       return;
     }
 
+    // CLA lookups start as soon as the first page of commits is read,
+    // while the remaining pages are still being fetched. They run one after
+    // the other, and stop at the first author who didn't sign.
+    // Fetching commits is retried from the first page on failures, so
+    // authors already looked up are skipped.
+    let lookups = Promise.resolve(true);
+    const lookedUpAuthors = new Set<string>();
     const allAuthors = await this._statusCheckService
       .getAllAuthorsByPullRequestId(
         data.repository.fullName,
         data.pullRequest.number,
-        this._settings.preApprovedAccounts
+        this._settings.preApprovedAccounts,
+        (emails) => {
+          const newEmails = emails.filter(
+            (email) => !lookedUpAuthors.has(email)
+          );
+          if (!newEmails.length) {
+            return;
+          }
+
+          newEmails.forEach((email) => lookedUpAuthors.add(email));
+          lookups = lookups.then(
+            (signed) => signed && this.allAuthorsHaveSignedTheCla(newEmails)
+          );
+          // failures are handled when awaiting the lookups below; this
+          // avoids unhandled rejections if fetching commits fails first
+          lookups.catch(() => undefined);
+        }
       );
 
     if (!allAuthors.length) {
@@ -179,9 +205,7 @@ class ClaCheckHandler {
     let status: StatusCheckInput;
 
     const challengeUrl = this.getTargetUrlWithChallenge(data);
-    const allAuthorsHaveSignedTheCla = await this.allAuthorsHaveSignedTheCla(
-      allAuthors
-    );
+    const allAuthorsHaveSignedTheCla = await lookups;
 
     if (allAuthorsHaveSignedTheCla) {
       status = new StatusCheckInput(
@@ -0,0 +1,179 @@
+import {inject, injectable} from "inversify";
+import {CheckJob, CheckJobsRepository} from "../domain/check-jobs";
+import {ClaCheckHandler} from "./check-cla";
+import {ClaCheckInput} from "../domain/cla";
+import {getEnvSettingOrDefault} from "../common/settings";
+import {TYPES} from "../../constants/types";
+
+// Number of jobs processed concurrently by this process.
+const WORKERS = parseInt(
+  getEnvSettingOrDefault("CHECK_QUEUE_WORKERS", "4"),
+  10
+);
+// How long a claimed job stays locked: if this process dies while handling
+// it, another worker takes it over after this time.
+const LEASE_SECONDS = 300;
+// How often idle workers look for jobs enqueued by other processes.
+const POLL_INTERVAL_MS = 5000;
+// Jobs failing this many times in a row are dropped. Each attempt already
+// includes the retries of ClaCheckHandler.checkCla.
+const MAX_ATTEMPTS = 5;
+
+export interface CheckQueueMetrics {
+  depth: number;
+  workers: number;
+  received: number;
+  coalesced: number;
+  coalescingRatio: number;
+  processed: number;
+  failed: number;
+  dropped: number;
+}
+
+function retryDelaySeconds(attempts: number): number {
+  return Math.min(30 * 2 ** attempts, 3600);
+}
+
+/**
+ * Runs CLA checks in the background, decoupling them from webhook requests.
+ *
+ * Jobs are stored in the database, one per pull request, so a burst of
+ * events for the same pull request (e.g. force-pushes) results in a single
+ * check of its latest head, and pending checks survive restarts.
+ */
+@injectable()
+export class ClaCheckQueue {
+  @inject(TYPES.CheckJobsRepository)
+  private _jobsRepository: CheckJobsRepository;
+
+  @inject(TYPES.ClaCheckHandler)
+  private _claCheckHandler: ClaCheckHandler;
+
+  private _started = false;
+  private _idleWorkers: (() => void)[] = [];
+  private _received = 0;
+  private _coalesced = 0;
+  private _processed = 0;
+  private _failed = 0;
+  private _dropped = 0;
+
+  async enqueue(input: ClaCheckInput): Promise<void> {
+    const coalesced = await this._jobsRepository.enqueue(input);
+
+    this._received += 1;
+    if (coalesced) {
+      this._coalesced += 1;
+    }
+
+    this.start();
+    this.wakeUpWorker();
+  }
+
+  /**
+   * Starts the workers of this process, if not already started.
+   */
+  start(): void {
+    if (this._started) {
+      return;
+    }
+
+    this._started = true;
+    for (let i = 0; i < WORKERS; i++) {
+      this.runWorker();
+    }
+  }
+
+  async getMetrics(): Promise<CheckQueueMetrics> {
+    return {
+      depth: await this._jobsRepository.countPending(),
+      workers: this._started ? WORKERS : 0,
+      received: this._received,
+      coalesced: this._coalesced,
+      coalescingRatio: this._received ? this._coalesced / this._received : 0,
+      processed: this._processed,
+      failed: this._failed,
+      dropped: this._dropped,
+    };
+  }
+
+  private wakeUpWorker(): void {
+    const wakeUp = this._idleWorkers.shift();
+
+    if (wakeUp) {
+      wakeUp();
+    }
+  }
+
+  private waitForJobs(): Promise<void> {
+    return new Promise((resolve) => {
+      const wakeUp = () => {
+        clearTimeout(timeout);
+        const index = this._idleWorkers.indexOf(wakeUp);
+        if (index > -1) {
+          this._idleWorkers.splice(index, 1);
+        }
+        resolve();
+      };
+      const timeout = setTimeout(wakeUp, POLL_INTERVAL_MS);
+      this._idleWorkers.push(wakeUp);
+    });
+  }
+
+  private async runWorker(): Promise<void> {
+    while (true) {
+      let job: CheckJob | null = null;
+
+      try {
+        job = await this._jobsRepository.claimNext(LEASE_SECONDS);
+      } catch (error) {
+        // tslint:disable-next-line: no-console
+        console.error(`Failed to claim a CLA check job: ${error}`);
+      }
+
+      if (job === null) {
+        await this.waitForJobs();
+        continue;
+      }
+
+      try {
+        await this.processJob(job);
+      } catch (error) {
+        // the job stays locked until its lease expires, then it's retried
+        // tslint:disable-next-line: no-console
+        console.error(
+          `Failed to update CLA check job for PR ${job.pullRequestId}: ` +
+            `${error}`
+        );
+      }
+    }
+  }
+
+  private async processJob(job: CheckJob): Promise<void> {
+    try {
+      await this._claCheckHandler.checkCla(job.input);
+    } catch (error) {
+      this._failed += 1;
+      // tslint:disable-next-line: no-console
+      console.error(
+        `CLA check for PR ${job.pullRequestId} failed ` +
+          `(attempt ${job.attempts}): ${error}`
+      );
+
+      if (job.attempts < MAX_ATTEMPTS) {
+        await this._jobsRepository.retryLater(
+          job,
+          retryDelaySeconds(job.attempts)
+        );
+        return;
+      }
+
+      // give up, unless a newer event arrived in the meantime
+      this._dropped += 1;
+      await this._jobsRepository.complete(job);
+      return;
+    }
+
+    this._processed += 1;
+    await this._jobsRepository.complete(job);
+  }
+}
@@ -7,7 +7,9 @@ import {
   ClasImportInput,
   ClasImportOutput,
   ClasImportEntryResult,
+  MAX_CLA_PAGE_SIZE,
 } from "../domain/cla";
+import {CursorPageFilters, CursorPaginatedSet} from "../common/paging";
 import {validateEmail} from "../common/emails";
 import {AgreementsRepository} from "../domain/agreements";
 import {v4 as uuid} from "uuid";
@@ -41,6 +43,22 @@ export class ClasHandler {
     return await this._clasRepository.getClaByEmailAddress(email);
   }
 
+  async getClas(
+    filters: CursorPageFilters
+  ): Promise<CursorPaginatedSet<ContributorLicenseAgreement>> {
+    if (
+      !Number.isInteger(filters.size) ||
+      filters.size < 1 ||
+      filters.size > MAX_CLA_PAGE_SIZE
+    ) {
+      throw new BadRequestError(
+        `The page size must be between 1 and ${MAX_CLA_PAGE_SIZE}`
+      );
+    }
+
+    return await this._clasRepository.getClas(filters);
+  }
+
   async importClas(data: ClasImportInput): Promise<ClasImportOutput> {
     const agreement = await this._agreementsRepository.getAgreement(
       data.agreementId
@@ -0,0 +1,60 @@
+import {LruCache} from "../service/common/cache";
+import {expect} from "chai";
+
+describe("LruCache", () => {
+  it("Returns cached values and counts hits and misses", () => {
+    const cache = new LruCache<string>(10);
+
+    expect(cache.get("a")).to.be.undefined;
+    cache.set("a", "A", 1000);
+    expect(cache.get("a")).to.eq("A");
+
+    const stats = cache.stats;
+    expect(stats.hits).to.eq(1);
+    expect(stats.misses).to.eq(1);
+    expect(stats.size).to.eq(1);
+  });
+
+  it("Caches null values", () => {
+    const cache = new LruCache<string | null>(10);
+
+    cache.set("a", null, 1000);
+    expect(cache.get("a")).to.be.null;
+  });
+
+  it("Expires entries after their time to live", () => {
+    let now = 0;
+    const cache = new LruCache<string>(10, () => now);
+
+    cache.set("short", "S", 10);
+    cache.set("long", "L", 100);
+    now = 50;
+
+    expect(cache.get("short")).to.be.undefined;
+    expect(cache.get("long")).to.eq("L");
+    expect(cache.size).to.eq(1);
+  });
+
+  it("Evicts the least recently used entries", () => {
+    const cache = new LruCache<number>(2);
+
+    cache.set("a", 1, 1000);
+    cache.set("b", 2, 1000);
+    cache.get("a");
+    cache.set("c", 3, 1000);
+
+    expect(cache.get("b")).to.be.undefined;
+    expect(cache.get("a")).to.eq(1);
+    expect(cache.get("c")).to.eq(3);
+    expect(cache.stats.evictions).to.eq(1);
+  });
+
+  it("Deletes entries", () => {
+    const cache = new LruCache<number>(2);
+
+    cache.set("a", 1, 1000);
+    cache.delete("a");
+
+    expect(cache.get("a")).to.be.undefined;
+  });
+});
@@ -0,0 +1,45 @@
+import {Semaphore} from "../service/common/concurrency";
+import {expect} from "chai";
+
+function sleep(ms: number): Promise<void> {
+  return new Promise((resolve) => setTimeout(resolve, ms));
+}
+
+describe("Semaphore", () => {
+  it("Limits the number of concurrent actions", async () => {
+    const semaphore = new Semaphore(2);
+    let running = 0;
+    let maxRunning = 0;
+
+    const action = async (value: number): Promise<number> => {
+      running += 1;
+      maxRunning = Math.max(maxRunning, running);
+      await sleep(5);
+      running -= 1;
+      return value;
+    };
+
+    const results = await Promise.all(
+      [1, 2, 3, 4, 5].map((value) => semaphore.run(() => action(value)))
+    );
+
+    expect(results).to.deep.eq([1, 2, 3, 4, 5]);
+    expect(maxRunning).to.eq(2);
+  });
+
+  it("Releases the slot of failing actions", async () => {
+    const semaphore = new Semaphore(1);
+
+    let error: Error | null = null;
+    try {
+      await semaphore.run(async () => {
+        throw new Error("Crash test");
+      });
+    } catch (e) {
+      error = e as Error;
+    }
+
+    expect(error).to.not.be.null;
+    expect(await semaphore.run(async () => 1)).to.eq(1);
+  });
+});
@@ -0,0 +1,24 @@
+import {decodeCursor, encodeCursor} from "../service/common/paging";
+import {BadRequestError} from "../service/common/web";
+import {expect} from "chai";
+
+describe("Cursors", () => {
+  it("Round-trip the values of a sort key", () => {
+    const values = ["2021-03-01T12:00:00.123456+00:00", "a/b+c?"];
+    const cursor = encodeCursor(values);
+
+    expect(cursor).to.match(/^[A-Za-z0-9_-]+$/);
+    expect(decodeCursor(cursor, 2)).to.deep.eq(values);
+  });
+
+  it("Reject invalid cursors", () => {
+    for (const cursor of [
+      "not a cursor",
+      encodeCursor(["only one"]),
+      Buffer.from(JSON.stringify([1, 2])).toString("base64"),
+      Buffer.from("{}").toString("base64"),
+    ]) {
+      expect(() => decodeCursor(cursor, 2)).to.throw(BadRequestError);
+    }
+  });
+});
@@ -0,0 +1,193 @@
+import "reflect-metadata";
+import {expect} from "chai";
+import {
+  claLookupCache,
+  EdgeDBClaRepository,
+} from "../service/data/edgedb/cla";
+import {ClaCheckInput} from "../service/domain/cla";
+import {EdgeDBCheckJobsRepository} from "../service/data/edgedb/check-jobs";
+import {getClient} from "../service/data/edgedb/connect";
+
+// These tests write to the database configured by the EDGEDB_* variables,
+// so they only run with EDGEDB_TESTS=1, against a disposable database with
+// the schema of dbschema/migrations.
+const enabled = !!process.env.EDGEDB_TESTS;
+const suffix = `${new Date().getTime()}`;
+
+describe("EdgeDB repositories", () => {
+  before(function (): void {
+    if (!enabled) {
+      this.skip();
+    }
+  });
+
+  after(async () => {
+    if (enabled) {
+      await (await getClient()).close();
+    }
+  });
+
+  describe("EdgeDBClaRepository", () => {
+    const username = `cla-test-${suffix}`;
+    const namedEmail = `cla-test-${suffix}-named@example.com`;
+    const anonymousEmail = `cla-test-${suffix}-anonymous@example.com`;
+    let versionId: string;
+
+    before(async () => {
+      const client = await getClient();
+      const version = await client.queryRequiredSingle<{id: string}>(
+        `INSERT AgreementVersion;`
+      );
+      versionId = version.id;
+      await client.query(
+        `WITH version := (SELECT AgreementVersion FILTER .id = <uuid>$version)
+        SELECT {
+          (INSERT ContributorLicenseAgreement {
+            email := <str>$named_email,
+            username := <str>$username,
+            agreement_version := version
+          }),
+          (INSERT ContributorLicenseAgreement {
+            email := <str>$anonymous_email,
+            agreement_version := version
+          })
+        };`,
+        {
+          version: versionId,
+          named_email: namedEmail,
+          anonymous_email: anonymousEmail,
+          username,
+        }
+      );
+    });
+
+    beforeEach(() => {
+      claLookupCache.clear();
+    });
+
+    after(async () => {
+      const client = await getClient();
+      await client.query(
+        `DELETE ContributorLicenseAgreement
+        FILTER .agreement_version.id = <uuid>$version;`,
+        {version: versionId}
+      );
+      await client.query(
+        `DELETE AgreementVersion FILTER .id = <uuid>$version;`,
+        {version: versionId}
+      );
+    });
+
+    it("Finds CLAs without a username by email address", async () => {
+      const repository = new EdgeDBClaRepository();
+
+      const clas = await repository.getClasByEmailAddresses([
+        anonymousEmail.toUpperCase(),
+        `123+${username}@users.noreply.github.com`,
+        `cla-test-${suffix}-missing@example.com`,
+      ]);
+
+      expect(clas.map((cla) => cla && cla.email)).to.eql([
+        anonymousEmail,
+        namedEmail,
+        null,
+      ]);
+    });
+
+    it("Agrees with the lookup of a single email address", async () => {
+      const repository = new EdgeDBClaRepository();
+
+      const single = await repository.getClaByEmailAddress(anonymousEmail);
+      claLookupCache.clear();
+      const [batched] = await repository.getClasByEmailAddresses([
+        anonymousEmail,
+      ]);
+
+      expect(batched).to.deep.eq(single);
+    });
+
+    it("Lists CLAs by email address prefix", async () => {
+      const repository = new EdgeDBClaRepository();
+
+      const page = await repository.getClas({
+        size: 10,
+        search: `CLA-TEST-${suffix}-`,
+      });
+      expect(page.items.map((cla) => cla.email).sort()).to.eql([
+        anonymousEmail,
+        namedEmail,
+      ]);
+      expect(page.total).to.eq(2);
+
+      // wildcards of LIKE patterns are plain characters in searches
+      const none = await repository.getClas({
+        size: 10,
+        search: `cla_test_${suffix}`,
+      });
+      expect(none.items).to.be.empty;
+    });
+  });
+
+  describe("EdgeDBCheckJobsRepository", () => {
+    // pull request ids can't collide with real ones, nor between runs
+    const pullRequestId = -new Date().getTime();
+
+    function getInput(headSha: string): ClaCheckInput {
+      return {
+        gitHubUserId: 1,
+        authors: null,
+        agreementVersionId: null,
+        repository: {
+          id: 1,
+          owner: "python",
+          ownerId: 1,
+          name: "cpython",
+          fullName: "python/cpython",
+        },
+        pullRequest: {
+          id: pullRequestId,
+          number: 1,
+          headSha,
+          url: "https://github.com/python/cpython/pull/1",
+        },
+      };
+    }
+
+    after(async () => {
+      const client = await getClient();
+      await client.query(
+        `DELETE CheckJob FILTER .pull_request_id = <int64>$id;`,
+        {id: pullRequestId}
+      );
+    });
+
+    it("Claims, completes, and claims again updated jobs", async () => {
+      const repository = new EdgeDBCheckJobsRepository();
+
+      expect(await repository.enqueue(getInput("a"))).to.be.false;
+      const first = await repository.claimNext(300);
+      expect(first && first.pullRequestId).to.eq(pullRequestId);
+      expect(first && first.attempts).to.eq(1);
+      expect(await repository.claimNext(300)).to.be.null;
+
+      // a newer event while the job is processed
+      expect(await repository.enqueue(getInput("b"))).to.be.true;
+      expect(await repository.claimNext(300)).to.be.null;
+      await repository.complete(first!);
+
+      const second = await repository.claimNext(300);
+      expect(second && second.input.pullRequest.headSha).to.eq("b");
+      expect(second && second.revision).to.eq(2);
+
+      // a newer event cancels the retry delay of a failed job
+      await repository.retryLater(second!, 3600);
+      expect(await repository.claimNext(300)).to.be.null;
+      await repository.enqueue(getInput("c"));
+      const third = await repository.claimNext(300);
+      expect(third && third.input.pullRequest.headSha).to.eq("c");
+
+      await repository.complete(third!);
+      expect(await repository.claimNext(300)).to.be.null;
+    });
+  });
+});
@@ -0,0 +1,100 @@
+import fs from "fs";
+import os from "os";
+import path from "path";
+import {
+  FileCredentialsStore,
+  MemoryCredentialsStore,
+} from "../service/data/github/credentials";
+import {expect} from "chai";
+
+describe("MemoryCredentialsStore", () => {
+  it("Returns stored credentials until they expire", async () => {
+    const store = new MemoryCredentialsStore();
+    const now = new Date().getTime();
+
+    await store.set("valid", {value: "A", expiresAt: now + 60000});
+    await store.set("expired", {value: "B", expiresAt: now - 1});
+
+    expect(await store.get("valid")).to.deep.eq({
+      value: "A",
+      expiresAt: now + 60000,
+    });
+    expect(await store.get("expired")).to.be.null;
+    expect(await store.get("missing")).to.be.null;
+
+    await store.delete("valid");
+    expect(await store.get("valid")).to.be.null;
+  });
+});
+
+describe("FileCredentialsStore", () => {
+  let directory: string;
+  let filePath: string;
+
+  beforeEach(() => {
+    directory = fs.mkdtempSync(path.join(os.tmpdir(), "credentials-"));
+    filePath = path.join(directory, "credentials.json");
+  });
+
+  afterEach(() => {
+    for (const name of fs.readdirSync(directory)) {
+      fs.unlinkSync(path.join(directory, name));
+    }
+    fs.rmdirSync(directory);
+  });
+
+  it("Shares credentials between instances", async () => {
+    const now = new Date().getTime();
+
+    await new FileCredentialsStore(filePath).set("a", {
+      value: "A",
+      expiresAt: now + 60000,
+    });
+
+    const store = new FileCredentialsStore(filePath);
+    expect(await store.get("a")).to.deep.eq({
+      value: "A",
+      expiresAt: now + 60000,
+    });
+    expect(await store.get("b")).to.be.null;
+    expect(fs.statSync(filePath).mode & 0o777).to.eq(0o600);
+  });
+
+  it("Drops expired credentials", async () => {
+    const store = new FileCredentialsStore(filePath);
+    const now = new Date().getTime();
+
+    await store.set("expired", {value: "A", expiresAt: now - 1});
+    await store.set("valid", {value: "B", expiresAt: now + 60000});
+
+    expect(await store.get("expired")).to.be.null;
+    expect(Object.keys(JSON.parse(fs.readFileSync(filePath, "utf8")))).to.eql(
+      ["valid"]
+    );
+  });
+
+  it("Keeps all keys of concurrent writes", async () => {
+    const expiresAt = new Date().getTime() + 60000;
+
+    await Promise.all(
+      ["a", "b", "c"].map((key) =>
+        new FileCredentialsStore(filePath).set(key, {value: key, expiresAt})
+      )
+    );
+    await new FileCredentialsStore(filePath).delete("b");
+
+    expect(fs.readdirSync(directory)).to.eql(["credentials.json"]);
+    expect(
+      Object.keys(JSON.parse(fs.readFileSync(filePath, "utf8"))).sort()
+    ).to.eql(["a", "c"]);
+  });
+
+  it("Ignores a missing or invalid file", async () => {
+    const store = new FileCredentialsStore(filePath);
+
+    expect(await store.get("a")).to.be.null;
+
+    fs.writeFileSync(filePath, "{");
+    expect(await store.get("a")).to.be.null;
+  });
+});